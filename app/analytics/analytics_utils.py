@@ -1,14 +1,462 @@
-from app.analytics.models import AIAnalytics
+import atexit
+import hashlib
+import logging
+import queue
+import threading
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BinaryField, Count, F, Q, Subquery, Window
+from django.db.models.functions import Substr
+from django.utils import timezone
+from django.utils.timesince import timesince
+from rest_framework import status
+
+from app.analytics.models import AIAnalytics, AIContentBlob, DailyAIUsage, DailyUserRegistration, UserCredit
+from app.global_constants import ErrorMessage, RoleConstants
+from app.job_source.models import Source
+from app.utils import get_response_schema
+
+logger = logging.getLogger('django')
+
+
+def parse_date(date_str):
+    """Parse a YYYY-MM-DD query parameter, returning None when it is missing or invalid."""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _adjust_rollup(model, delta, **keys):
+    """Add `delta` to the count of the rollup row identified by `keys`, creating it on first use."""
+    if delta < 0:
+        model.objects.filter(count__gte=-delta, **keys).update(count=F("count") + delta)
+        return
+
+    if model.objects.filter(**keys).update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **keys)
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**keys).update(count=F("count") + delta)
+
+
+def increment_daily_ai_usage(generation_type, created=None, delta=1):
+    _adjust_rollup(
+        DailyAIUsage,
+        delta,
+        date=timezone.localdate(created or timezone.now()),
+        generation_type=generation_type,
+    )
+
+
+def adjust_daily_user_registration(user, delta):
+    """Count an activated (+1) or deactivated (-1) user on the day they registered."""
+    _adjust_rollup(
+        DailyUserRegistration,
+        delta,
+        date=timezone.localdate(user.created),
+        role_id=user.role_id,
+    )
+
+
+def attach_content_blobs(records):
+    """
+    Move the content of unsaved AIAnalytics rows into compressed, content-addressed blobs.
+
+    Rows with identical content (e.g. cached generations) share a single blob.
+    """
+    contents = {}
+    for record in records:
+        # Kept on the record so a batch that is retried after a rollback still has its content
+        if not hasattr(record, "blob_data"):
+            record.blob_data = str(record.content).encode("utf-8")
+        record.blob_sha256 = hashlib.sha256(record.blob_data).hexdigest()
+        contents[record.blob_sha256] = record.blob_data
+
+    AIContentBlob.objects.bulk_create(
+        [AIContentBlob(sha256=sha256, data=zlib.compress(data), size=len(data)) for sha256, data in contents.items()],
+        ignore_conflicts=True,
+    )
+    blob_ids = dict(AIContentBlob.objects.filter(sha256__in=contents).values_list("sha256", "id"))
+
+    for record in records:
+        record.blob_id = blob_ids[record.blob_sha256]
+        record.content = ""
+        set_content_summary(record, record.blob_data)
+
+
+def set_content_summary(ai_analytics, data: bytes):
+    """Fill the size and preview columns served by the list endpoint."""
+    ai_analytics.content_size = len(data)
+    preview_length = AIAnalytics._meta.get_field("content_preview").max_length
+    ai_analytics.content_preview = data[:preview_length * 4].decode("utf-8", errors="ignore")[:preview_length]
+
+
+def iter_ai_analytics_content(ai_analytics, chunk_size: int = 64 * 1024):
+    """
+    Yield the content of an AIAnalytics row as UTF-8 bytes, decompressing incrementally.
+
+    The compressed blob is read `chunk_size` bytes per query, so neither it nor the
+    decompressed content is ever held in memory as a whole.
+    """
+    if ai_analytics.blob_id is None:
+        yield ai_analytics.content.encode("utf-8")
+        return
+
+    blob = AIContentBlob.objects.filter(pk=ai_analytics.blob_id)
+    decompressor = zlib.decompressobj()
+    start = 1  # SQL substrings are 1-based
+    while True:
+        data = blob.annotate(
+            chunk=Substr("data", start, chunk_size, output_field=BinaryField())
+        ).values_list("chunk", flat=True).first()
+        if not data:
+            break
+        chunk = decompressor.decompress(data)
+        if chunk:
+            yield chunk
+        if len(data) < chunk_size:
+            break
+        start += chunk_size
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+class AnalyticsWriter:
+    """
+    Buffer AIAnalytics rows in-process and insert them with bulk_create off the request path.
+
+    A background thread flushes the buffer every `flush_interval` seconds, or as soon as
+    `batch_size` rows are waiting. The buffer is flushed one last time when the process
+    exits: from gunicorn's worker_exit hook (gunicorn.conf.py) on shutdown and
+    max_requests recycling, and from atexit elsewhere.
+
+    A process killed without a shutdown (SIGKILL after graceful_timeout, OOM) loses the
+    rows buffered since the last flush: at most `flush_interval` seconds or `batch_size`
+    rows. Set ANALYTICS_BUFFERED_WRITES=False to insert every row on the request instead.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_retries: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue()
+        self._flush_requested = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def add(self, record):
+        self._queue.put(record)
+        self._ensure_thread()
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            finally:
+                # Do not keep a connection open between flushes in this thread
+                connection.close()
+
+    def _insert(self, records):
+        with transaction.atomic():
+            for record in records:
+                # bulk_create may have assigned ids before an earlier attempt rolled back
+                record.pk = None
+            attach_content_blobs(records)
+            AIAnalytics.objects.bulk_create(records, batch_size=self.batch_size)
+
+    def _insert_by_halves(self, records) -> list:
+        """Insert `records`, splitting failing batches until each bad row is isolated and dropped."""
+        try:
+            self._insert(records)
+            return records
+        except Exception as e:
+            if len(records) == 1:
+                record = records[0]
+                logger.error(
+                    f"Dropping AI analytics record for user {record.user_id} ({record.generation_type}): {e}",
+                    exc_info=True,
+                )
+                return []
+        middle = len(records) // 2
+        return self._insert_by_halves(records[:middle]) + self._insert_by_halves(records[middle:])
+
+    def flush(self):
+        """
+        Write every buffered row in one batch.
+
+        A failed batch is put back and retried on the next flushes. Once a row has failed
+        `max_retries` times its batch is split in halves to find the rows that cannot be
+        written; those are logged and dropped so they do not block the rest of the buffer.
+        """
+        with self._flush_lock:
+            records = []
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not records:
+                return
+
+            try:
+                self._insert(records)
+            except Exception as e:
+                logger.error(f"Could not write {len(records)} AI analytics records: {e}", exc_info=True)
+                for record in records:
+                    record.write_failures = getattr(record, "write_failures", 0) + 1
+                exhausted = [record for record in records if record.write_failures >= self.max_retries]
+                if not exhausted:
+                    for record in records:
+                        self._queue.put(record)
+                    return
+                records = self._insert_by_halves(records)
+                if not records:
+                    return
+
+            # created is filled in by bulk_create, so the rollup matches the stored rows
+            usage = Counter((timezone.localdate(record.created), record.generation_type) for record in records)
+            try:
+                for (date, generation_type), count in usage.items():
+                    _adjust_rollup(DailyAIUsage, count, date=date, generation_type=generation_type)
+            except Exception as e:
+                # The rows are stored; rebuild_analytics_rollups repairs the counters
+                logger.error(f"Could not update the daily AI usage rollup: {e}", exc_info=True)
+
+            # bulk_create sends no post_save signals
+            invalidate_dashboard_summary()
+
+
+analytics_writer = AnalyticsWriter(
+    batch_size=settings.ANALYTICS_BATCH_SIZE,
+    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL,
+    max_retries=settings.ANALYTICS_WRITE_MAX_RETRIES,
+)
+atexit.register(analytics_writer.flush)
 
 
 def save_ai_analytics(user, generation_type, content):
 
     ai_analytics = AIAnalytics(
-        user=user,
+        user_id=user.id,
         generation_type=generation_type,
         content=content
     )
 
-    ai_analytics.save()
+    if settings.ANALYTICS_BUFFERED_WRITES:
+        analytics_writer.add(ai_analytics)
+    else:
+        attach_content_blobs([ai_analytics])
+        ai_analytics.save()
+        increment_daily_ai_usage(generation_type, ai_analytics.created)
+
+    return ai_analytics
+
+
+def get_user_credit(user_id):
+    """Return the user's credit ledger, opening it from their past usage on first access."""
+    credit = UserCredit.objects.filter(user_id=user_id).first()
+    if credit:
+        return credit
+
+    credits_used = AIAnalytics.objects.filter(user_id=user_id).count()
+    credit, _ = UserCredit.objects.get_or_create(
+        user_id=user_id,
+        defaults={"balance": max(settings.AI_CREDIT_LIMIT - credits_used, 0)},
+    )
+    return credit
+
+
+def reserve_credit(user_id) -> bool:
+    """Atomically take one credit from the user's balance; False when none are left."""
+    if UserCredit.objects.filter(user_id=user_id, balance__gte=1).update(balance=F("balance") - 1):
+        return True
+
+    if UserCredit.objects.filter(user_id=user_id).exists():
+        return False
+
+    get_user_credit(user_id)
+    return bool(UserCredit.objects.filter(user_id=user_id, balance__gte=1).update(balance=F("balance") - 1))
+
+
+def release_credit(user_id):
+    """Give back a credit reserved for a generation that did not complete."""
+    UserCredit.objects.filter(user_id=user_id).update(balance=F("balance") + 1)
+
+
+def credit_required(view_method):
+    """
+    Decorator: reserve one credit before an AI view runs.
+
+    The reservation is released when the view raises or responds with an error status,
+    so only successful generations are charged.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not reserve_credit(request.user.id):
+            return get_response_schema(
+                {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.INSUFFICIENT_CREDITS.value]},
+                ErrorMessage.INSUFFICIENT_CREDITS.value,
+                status.HTTP_402_PAYMENT_REQUIRED
+            )
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            release_credit(request.user.id)
+            raise
+
+        if response.status_code >= 400:
+            release_credit(request.user.id)
+        return response
+
+    return wrapper
+
+
+DASHBOARD_SUMMARY_CACHE_KEY = "analytics:dashboard-summary"
+
+
+def get_dashboard_counts():
+    """User and source counts of the dashboard, in two queries."""
+    last_user = (
+        get_user_model().objects
+        .filter(is_active=True, role=RoleConstants.USER.value)
+        .annotate(user_count=Window(Count("id")))
+        .order_by("-created")
+        .values("email", "created", "user_count")
+        .first()
+    )
+    source_counts = Source.objects.aggregate(
+        total_sources=Count("id"),
+        active_sources=Count("id", filter=Q(is_active=True)),
+    )
+
+    return {
+        "user_count": last_user["user_count"] if last_user else 0,
+        "last_user_registered": last_user["email"] if last_user else None,
+        "last_user_registered_at": last_user["created"] if last_user else None,
+        **source_counts,
+    }
+
+
+def format_dashboard_counts(counts):
+    """Replace the last registration time by the time elapsed since, computed per response."""
+    counts = dict(counts)
+    last_user_registered_at = counts.pop("last_user_registered_at")
+    counts["time_till_last_user_registered"] = timesince(last_user_registered_at) if last_user_registered_at else None
+    return counts
+
+
+def get_registration_trend(start_date=None, end_date=None):
+    users_by_day = DailyUserRegistration.objects.filter(role_id=RoleConstants.USER.value, count__gt=0)
+    if start_date:
+        users_by_day = users_by_day.filter(date__gte=start_date)
+    if end_date:
+        users_by_day = users_by_day.filter(date__lte=end_date)
+    users_by_day = users_by_day.values('date', 'count').order_by('date')
+
+    dates = [u['date'].strftime("%Y-%m-%d") for u in users_by_day]
+    counts = [u['count'] for u in users_by_day]
+
+    return {"dates": dates, "counts": counts}
+
+
+def get_source_popularity():
+    source_stats = (
+        Source.objects
+        .filter(is_active=True, subscriber_count__gt=0)
+        .order_by("-subscriber_count")
+        .values("name", "subscriber_count")
+    )
+
+    sources = [item["name"] for item in source_stats]
+    counts = [item["subscriber_count"] for item in source_stats]
+
+    return {"sources": sources, "counts": counts}
+
+
+def get_daily_ai_usage(start_date=None, end_date=None):
+    """Daily AI call counts per generation type; the last 5 active days when no range is given."""
+    usage_qs = DailyAIUsage.objects.filter(count__gt=0)
+    if start_date:
+        usage_qs = usage_qs.filter(date__gte=start_date)
+    if end_date:
+        usage_qs = usage_qs.filter(date__lte=end_date)
+
+    if not (start_date or end_date):
+        last_dates = usage_qs.values("date").order_by("-date").distinct()[:5]
+        usage_qs = usage_qs.filter(date__in=Subquery(last_dates))
+
+    aggregated = list(usage_qs.values("date", "generation_type", "count").order_by("date", "generation_type"))
+
+    date_list = sorted({row["date"] for row in aggregated})
+    date_labels = [date.strftime("%Y-%m-%d") for date in date_list]
+    date_index = {date: idx for idx, date in enumerate(date_list)}
+
+    series_map = defaultdict(lambda: [0] * len(date_list))
+    totals_by_type = defaultdict(int)
+    for row in aggregated:
+        idx = date_index[row["date"]]
+        gen_type = row["generation_type"]
+        count = row["count"]
+        series_map[gen_type][idx] = count
+        totals_by_type[gen_type] += count
+
+    totals_by_type = dict(totals_by_type)
+    total_calls = sum(totals_by_type.values())
+    series = [
+        {"label": gen_type, "data": counts}
+        for gen_type, counts in series_map.items()
+    ]
+
+    return {
+        "dates": date_labels,
+        "series": series,
+        "total_calls": total_calls,
+        "totals_by_type": totals_by_type,
+    }
+
+
+def get_dashboard_summary():
+    """Everything the super admin dashboard shows, cached until a write invalidates it."""
+    summary = cache.get(DASHBOARD_SUMMARY_CACHE_KEY)
+    if summary is None:
+        summary = {
+            "counts": get_dashboard_counts(),
+            "registration_trend": get_registration_trend(),
+            "source_popularity": get_source_popularity(),
+            "daily_ai_usage": get_daily_ai_usage(),
+        }
+        cache.set(DASHBOARD_SUMMARY_CACHE_KEY, summary, settings.DASHBOARD_SUMMARY_CACHE_TTL)
+    return summary
+
 
-    return ai_analytics
\ No newline at end of file
+def invalidate_dashboard_summary():
+    cache.delete(DASHBOARD_SUMMARY_CACHE_KEY)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.analytics'
+
+    def ready(self):
+        # Connect the dashboard cache invalidation receivers
+        from app.analytics import signals  # noqa: F401
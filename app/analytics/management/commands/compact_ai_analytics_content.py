@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from app.analytics.analytics_utils import attach_content_blobs, iter_ai_analytics_content
+from app.analytics.models import AIAnalytics
+
+
+class Command(BaseCommand):
+    help = "Move the inline content of existing AIAnalytics rows into compressed, deduplicated blobs and fill their size / preview."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows compacted per transaction.")
+
+    def handle(self, *args, **options):
+        compacted = 0
+        last_pk = 0
+        while True:
+            records = list(
+                AIAnalytics.objects
+                .filter(Q(blob__isnull=True) | Q(content_size=0), pk__gt=last_pk)
+                # blob_id only: compacted blobs are streamed by id, never loaded whole
+                .only("pk", "content", "blob")
+                .order_by("pk")[:options["batch_size"]]
+            )
+            if not records:
+                break
+
+            for record in records:
+                if record.blob_id is not None:
+                    # Compacted before size / preview were tracked
+                    record.blob_data = b"".join(iter_ai_analytics_content(record))
+
+            with transaction.atomic():
+                attach_content_blobs(records)
+                AIAnalytics.objects.bulk_update(records, ["blob", "content", "content_size", "content_preview"])
+
+            compacted += len(records)
+            last_pk = records[-1].pk
+            self.stdout.write(f"Compacted {compacted} rows...")
+
+        self.stdout.write(self.style.SUCCESS(f"Compacted {compacted} AI analytics rows."))
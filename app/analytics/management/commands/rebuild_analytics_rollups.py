@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from app.analytics.analytics_utils import parse_date
+from app.analytics.models import AIAnalytics, DailyAIUsage, DailyUserRegistration
+
+
+class Command(BaseCommand):
+    help = "Backfill or repair the daily AI usage and user registration rollup tables from the source rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-date", help="First day to rebuild (YYYY-MM-DD). Defaults to the beginning.")
+        parser.add_argument("--end-date", help="Last day to rebuild (YYYY-MM-DD). Defaults to today.")
+
+    def handle(self, *args, **options):
+        date_filter = {}
+        for option, lookup in (("start_date", "date__gte"), ("end_date", "date__lte")):
+            if options[option]:
+                date = parse_date(options[option])
+                if not date:
+                    raise CommandError(f"Invalid {option.replace('_', '-')}: {options[option]}")
+                date_filter[lookup] = date
+
+        ai_usage = (
+            AIAnalytics.objects.filter(is_active=True)
+            .annotate(date=TruncDate("created"))
+            .filter(**date_filter)
+            .values("date", "generation_type")
+            .annotate(count=Count("id"))
+        )
+        registrations = (
+            get_user_model().objects.filter(is_active=True)
+            .annotate(date=TruncDate("created"))
+            .filter(**date_filter)
+            .values("date", "role_id")
+            .annotate(count=Count("id"))
+        )
+
+        with transaction.atomic():
+            DailyAIUsage.objects.filter(**date_filter).delete()
+            DailyAIUsage.objects.bulk_create(DailyAIUsage(**row) for row in ai_usage)
+
+            DailyUserRegistration.objects.filter(**date_filter).delete()
+            DailyUserRegistration.objects.bulk_create(DailyUserRegistration(**row) for row in registrations)
+
+        self.stdout.write(self.style.SUCCESS("Analytics rollups rebuilt."))
@@ -2,9 +2,23 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from app.role.models import Role
+
 
 # Create your models here.
 
+class AIContentBlob(models.Model):
+    """ Model: zlib-compressed AI output, shared by every AIAnalytics row with identical content """
+
+    # Field declarations
+    sha256 = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()  # uncompressed size in bytes
+
+    # Additional Field declarations
+    created = models.DateTimeField(auto_now_add=True)
+
+
 class AIAnalytics(models.Model):
     # Feature enum declarations
     class GenerationType(models.TextChoices):
@@ -32,6 +46,14 @@ class AIAnalytics(models.Model):
         related_name="user_ai_analytics",
         related_query_name="user_ai_analytic"
     )
+    blob = models.ForeignKey(
+        AIContentBlob,
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+        related_name="ai_analytics",
+        related_query_name="ai_analytic"
+    )
 
     # Field declarations
     generation_type = models.CharField(
@@ -40,9 +62,78 @@ class AIAnalytics(models.Model):
         default=GenerationType.COVER_LETTER,
     )
 
-    content = models.TextField()
+    content = models.TextField(blank=True, default="")  # only set on rows not yet compacted into a blob
+    content_size = models.PositiveIntegerField(default=0)  # bytes
+    content_preview = models.CharField(max_length=300, blank=True, default="")
 
     # Additional Field declarations
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # API-call history: a user's active rows, newest first (keyset on created, pk)
+            models.Index(
+                fields=["user", "-created", "-id"],
+                condition=models.Q(is_active=True),
+                name="aianalytics_user_active_recent",
+            ),
+        ]
+
+
+class DailyAIUsage(models.Model):
+    """ Model: Daily AI call count per generation type, maintained alongside AIAnalytics """
+
+    # Field declarations
+    date = models.DateField()
+    generation_type = models.CharField(
+        max_length=50,
+        choices=AIAnalytics.GenerationType.choices,
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "generation_type"], name="dailyaiusage_date_type_unique"),
+        ]
+
+
+class DailyUserRegistration(models.Model):
+    """ Model: Daily count of active users per role, keyed by registration date """
+
+    # Foreign key
+    role = models.ForeignKey(
+        Role,
+        on_delete=models.CASCADE,
+        related_name="daily_registrations",
+        related_query_name="daily_registration"
+    )
+
+    # Field declarations
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "role"], name="dailyuserregistration_date_role_unique"),
+        ]
+
+
+class UserCredit(models.Model):
+    """ Model: Remaining AI generation credits of a user """
+
+    # Foreign key
+    user = models.OneToOneField(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="credit",
+        related_query_name="credit"
+    )
+
+    # Field declarations
+    balance = models.PositiveIntegerField(default=0)
+
+    # Additional Field declarations
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
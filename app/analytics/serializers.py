@@ -7,4 +7,4 @@ class AIAnalyticsListFilterDisplaySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = AIAnalytics
-        fields = ('pk', 'generation_type', 'content', 'created')
\ No newline at end of file
+        fields = ('pk', 'generation_type', 'content_preview', 'content_size', 'created')
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from app.analytics.analytics_utils import invalidate_dashboard_summary
+from app.analytics.models import AIAnalytics
+from app.job_source.models import Source, UserSource
+
+
+def dashboard_data_changed(sender, **kwargs):
+    # After commit, so a concurrent dashboard load cannot cache the pre-write state again
+    transaction.on_commit(invalidate_dashboard_summary)
+
+
+for model in (get_user_model(), Source, UserSource, AIAnalytics):
+    post_save.connect(dashboard_data_changed, sender=model, dispatch_uid=f"dashboard_summary_save_{model.__name__}")
+    post_delete.connect(dashboard_data_changed, sender=model, dispatch_uid=f"dashboard_summary_delete_{model.__name__}")
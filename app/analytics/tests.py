@@ -1,3 +1,244 @@
-from django.test import TestCase
+import importlib.util
+import os
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from app.analytics.analytics_utils import DASHBOARD_SUMMARY_CACHE_KEY, AnalyticsWriter, attach_content_blobs, \
+    credit_required, get_dashboard_summary, iter_ai_analytics_content, reserve_credit, save_ai_analytics
+from app.analytics.models import AIAnalytics, UserCredit
+from app.analytics.views import APICallListFilter
+from app.core.tests import IndexPlanTestCase
+from app.global_constants import RoleConstants
+from app.job_source.models import Source
+from app.role.models import Role
+from app.user.authentication import ClaimsRefreshToken
+
+
+class AnalyticsWriterTests(TestCase):
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user("writer@example.com", "password", role=role)
+        self.writer = AnalyticsWriter(batch_size=10, flush_interval=60, max_retries=2)
+
+    def _record(self, user_id):
+        return AIAnalytics(user_id=user_id, generation_type=AIAnalytics.GenerationType.RESUME, content="content")
+
+    def test_failed_batch_is_retried(self):
+        self.writer._queue.put(self._record(None))
+        self.writer.flush()
+        self.assertEqual(self.writer._queue.qsize(), 1)
+
+    def test_bad_rows_are_dropped_after_max_retries(self):
+        for user_id in (self.user.id, None, self.user.id):
+            self.writer._queue.put(self._record(user_id))
+
+        self.writer.flush()
+        self.assertEqual(AIAnalytics.objects.count(), 0)
+        self.assertEqual(self.writer._queue.qsize(), 3)
+
+        self.writer.flush()
+        self.assertEqual(self.writer._queue.qsize(), 0)
+        self.assertEqual(AIAnalytics.objects.filter(user=self.user).count(), 2)
+
+    def test_gunicorn_worker_exit_flushes_the_buffer(self):
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", settings.BASE_DIR / "gunicorn.conf.py")
+        gunicorn_conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(gunicorn_conf)
+        self.writer._queue.put(self._record(self.user.id))
+
+        with mock.patch("app.analytics.analytics_utils.analytics_writer", self.writer):
+            gunicorn_conf.worker_exit(server=None, worker=None)
+
+        self.assertEqual(self.writer._queue.qsize(), 0)
+        self.assertEqual(AIAnalytics.objects.filter(user=self.user).count(), 1)
+
+
+class AIAnalyticsContentTests(TestCase):
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user("content@example.com", "password", role=role)
+        # Incompressible content, so the compressed blob spans several chunks
+        self.content = os.urandom(100 * 1024).hex()
+        self.record = AIAnalytics(user=self.user, generation_type=AIAnalytics.GenerationType.RESUME,
+                                  content=self.content)
+        attach_content_blobs([self.record])
+        self.record.save()
+
+    def test_blob_is_read_and_decompressed_in_chunks(self):
+        chunk_size = 16 * 1024
+        with self.assertNumQueries(len(self.record.blob.data) // chunk_size + 1):
+            content = b"".join(iter_ai_analytics_content(self.record, chunk_size=chunk_size))
+        self.assertEqual(content.decode("utf-8"), self.content)
+
+    def test_detail_view_streams_content(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(self.user).access_token}")
+
+        response = client.get(f"/api/analytics/api-call/{self.record.pk}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content).decode("utf-8"), self.content)
+        self.assertEqual(response["X-Generation-Type"], AIAnalytics.GenerationType.RESUME)
+
+    def test_compaction_backfills_size_without_loading_blobs(self):
+        # Compacted before size / preview were tracked
+        AIAnalytics.objects.filter(pk=self.record.pk).update(content_size=0, content_preview="")
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("compact_ai_analytics_content", stdout=StringIO())
+
+        batch_query = next(query["sql"] for query in queries.captured_queries if "content_size" in query["sql"])
+        self.assertNotIn('"data"', batch_query)
+        self.record.refresh_from_db()
+        self.assertEqual(self.record.content_size, len(self.content))
+        self.assertEqual(self.record.content_preview, self.content[:len(self.record.content_preview)])
+
+
+class CreditView:
+    def __init__(self, response=None, error=None):
+        self.response, self.error = response, error
+
+    @credit_required
+    def post(self, request):
+        if self.error:
+            raise self.error
+        return self.response
+
+
+@override_settings(AI_CREDIT_LIMIT=3)
+class CreditRequiredTests(TestCase):
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user("credit@example.com", "password", role=role)
+        self.request = SimpleNamespace(user=self.user)
+
+    def balance(self):
+        return UserCredit.objects.get(user=self.user).balance
+
+    def test_ledger_opens_from_past_usage(self):
+        AIAnalytics.objects.create(user=self.user, generation_type=AIAnalytics.GenerationType.RESUME, content="x")
+        self.assertTrue(reserve_credit(self.user.id))
+        self.assertEqual(self.balance(), 1)
+
+    def test_successful_response_keeps_the_reservation(self):
+        response = CreditView(Response(status=status.HTTP_200_OK)).post(self.request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.balance(), 2)
+
+    def test_error_response_releases_the_reservation(self):
+        CreditView(Response(status=status.HTTP_400_BAD_REQUEST)).post(self.request)
+        self.assertEqual(self.balance(), 3)
+
+    def test_exception_releases_the_reservation(self):
+        with self.assertRaises(RuntimeError):
+            CreditView(error=RuntimeError("LLM down")).post(self.request)
+        self.assertEqual(self.balance(), 3)
+
+    def test_no_credit_left_is_payment_required(self):
+        UserCredit.objects.create(user=self.user, balance=0)
+        view = CreditView(Response(status=status.HTTP_200_OK))
+        self.assertEqual(view.post(self.request).status_code, status.HTTP_402_PAYMENT_REQUIRED)
+        self.assertEqual(self.balance(), 0)
+
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    ANALYTICS_BUFFERED_WRITES=False,
+)
+class DashboardSummaryCacheTests(TestCase):
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user("dashboard@example.com", "password", role=role)
+        self.source = Source.objects.create(name="Feed")
+        cache.clear()
+
+    def test_summary_is_served_from_the_cache(self):
+        summary = get_dashboard_summary()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard_summary(), summary)
+
+    def test_write_is_not_visible_before_commit(self):
+        summary = get_dashboard_summary()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Source.objects.create(name="Another feed")
+
+        self.assertTrue(callbacks)
+        self.assertEqual(get_dashboard_summary(), summary)
+
+    def test_each_write_refreshes_the_summary(self):
+        def select_source():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(self.user).access_token}")
+            response = client.post("/api/job-source/select",
+                                   [{"source": self.source.pk, "frequency": "daily", "alert": True}], format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        writes = [
+            ("user registered", lambda: get_user_model().objects.create_user(
+                "new@example.com", "password", role_id=RoleConstants.USER.value),
+             lambda summary: summary["counts"]["user_count"], 2),
+            ("source created", lambda: Source.objects.create(name="Another feed"),
+             lambda summary: summary["counts"]["total_sources"], 2),
+            ("source selected", select_source,
+             lambda summary: summary["source_popularity"]["counts"], [1]),
+            ("AI call saved", lambda: save_ai_analytics(self.user, AIAnalytics.GenerationType.RESUME, "content"),
+             lambda summary: summary["daily_ai_usage"]["total_calls"], 1),
+            ("source deleted", lambda: Source.objects.filter(name="Another feed").get().delete(),
+             lambda summary: summary["counts"]["total_sources"], 1),
+        ]
+        for name, write, read, expected in writes:
+            with self.subTest(name):
+                get_dashboard_summary()
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+
+                self.assertIsNone(cache.get(DASHBOARD_SUMMARY_CACHE_KEY))
+                self.assertEqual(read(get_dashboard_summary()), expected)
+
+    def test_buffered_analytics_flush_refreshes_the_summary(self):
+        get_dashboard_summary()
+        writer = AnalyticsWriter(batch_size=10, flush_interval=60, max_retries=2)
+        writer._queue.put(AIAnalytics(user=self.user, generation_type=AIAnalytics.GenerationType.RESUME, content="x"))
+
+        writer.flush()
+
+        self.assertEqual(get_dashboard_summary()["daily_ai_usage"]["total_calls"], 1)
+
+class AIAnalyticsIndexPlanTests(IndexPlanTestCase):
+    """APICallListFilter pages are answered from the AIAnalytics index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"history{index}@example.com", password="!", role=role) for index in range(50)
+        )
+        AIAnalytics.objects.bulk_create(
+            AIAnalytics(user=users[index % len(users)], generation_type=AIAnalytics.GenerationType.RESUME,
+                        content_preview="preview", is_active=index % 10 != 0)
+            for index in range(5000)
+        )
+        cls.analyze(AIAnalytics)
+        cls.user = users[0]
+
+    def test_history_uses_partial_index(self):
+        self.assertUsesIndex(self.explain_page(APICallListFilter, self.user), "aianalytics_user_active_recent")
+
+    def test_history_filtered_by_type_uses_partial_index(self):
+        plan = self.explain_page(APICallListFilter, self.user, generation_type=AIAnalytics.GenerationType.RESUME)
+        self.assertUsesIndex(plan, "aianalytics_user_active_recent")
@@ -1,7 +1,8 @@
 from django.urls import path
 
 from app.analytics.views import CountAPIView, UserRegistrationTrendAPIView, \
-    SourcePopularityAPIView, DailyAIUsageAPIView, CreditRemainingAPIView, APICallListFilter
+    SourcePopularityAPIView, DailyAIUsageAPIView, CreditRemainingAPIView, APICallListFilter, \
+    APICallDetailAPIView, DashboardSummaryAPIView
 
 urlpatterns = [
     path("count", CountAPIView.as_view(), name="count"),
@@ -11,7 +12,10 @@ urlpatterns = [
 
     path("daily-ai-usage", DailyAIUsageAPIView.as_view(), name="daily-ai-usage"),
 
+    path("summary", DashboardSummaryAPIView.as_view(), name="summary"),
+
     path("credit-remaining", CreditRemainingAPIView.as_view(), name="credit-remaining"),
 
     path("api-call-list-filter", APICallListFilter.as_view(), name="api-call-list-filter"),
+    path("api-call/<int:pk>", APICallDetailAPIView.as_view(), name="api-call-detail"),
 ]
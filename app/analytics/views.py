@@ -1,22 +1,17 @@
-from collections import defaultdict
-from datetime import datetime, timedelta
-
-from django.contrib.auth import get_user_model
-from django.db.models import Count
-from django.db.models.functions import TruncDate
-from django.utils.timesince import timesince
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView, ListAPIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from app.analytics.analytics_utils import get_user_credit, iter_ai_analytics_content, parse_date, \
+    get_dashboard_counts, format_dashboard_counts, get_registration_trend, get_source_popularity, get_daily_ai_usage, \
+    get_dashboard_summary
 from app.analytics.models import AIAnalytics
 from app.analytics.serializers import AIAnalyticsListFilterDisplaySerializer
-from app.core.views import CustomPageNumberPagination
-from app.global_constants import RoleConstants, SuccessMessage
-from app.job_source.models import Source, UserSource
+from app.core.views import KeysetPagination
+from app.global_constants import ErrorMessage, SuccessMessage
 from app.utils import get_response_schema
 from permissions import IsSuperAdmin, IsUser
 
@@ -26,22 +21,7 @@ class CountAPIView(GenericAPIView):
     permission_classes = [IsSuperAdmin]
 
     def get(self, request):
-        user_count = get_user_model().objects.filter(is_active=True, role=RoleConstants.USER.value).count()
-
-        last_user_registered = get_user_model().objects.filter(is_active=True, role=RoleConstants.USER.value).order_by(
-            '-created').first()
-        ime_till_last_user_registered =timesince(last_user_registered.created)
-
-        total_sources = Source.objects.all().count()
-        active_sources = Source.objects.filter(is_active=True).count()
-
-        return_data = {
-            "user_count": user_count,
-            "last_user_registered": last_user_registered.email,
-            "time_till_last_user_registered": ime_till_last_user_registered,
-            "total_sources": total_sources,
-            "active_sources": active_sources
-        }
+        return_data = format_dashboard_counts(get_dashboard_counts())
 
         return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
@@ -50,21 +30,17 @@ class UserRegistrationTrendAPIView(GenericAPIView):
 
     permission_classes = [IsSuperAdmin]
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("start_date", openapi.IN_QUERY, description="First day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter("end_date", openapi.IN_QUERY, description="Last day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+        ]
+    )
     def get(self, request):
-        from django.db.models import Count
-        users_by_day = (
-            get_user_model().objects
-            .filter(is_active=True, role=RoleConstants.USER.value)
-            .annotate(date= TruncDate('created'))
-            .values('date')
-            .annotate(count=Count('id'))
-            .order_by('date')
-        )
+        start_date = parse_date(request.query_params.get("start_date"))
+        end_date = parse_date(request.query_params.get("end_date"))
 
-        dates = [u['date'].strftime("%Y-%m-%d") for u in users_by_day]
-        counts = [u['count'] for u in users_by_day]
-
-        return_data = {"dates": dates, "counts": counts}
+        return_data = get_registration_trend(start_date, end_date)
 
         return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
@@ -74,18 +50,7 @@ class SourcePopularityAPIView(GenericAPIView):
     permission_classes = [IsSuperAdmin]
 
     def get(self, request):
-        source_stats = (
-            UserSource.objects.select_related("source")
-            .filter(is_active=True,source__is_active=True)
-            .values("source__name")
-            .annotate(user_count=Count("user", distinct=True))
-            .order_by("-user_count")
-        )
-
-        sources = [item["source__name"] for item in source_stats]
-        counts = [item["user_count"] for item in source_stats]
-
-        return_data = {"sources": sources, "counts": counts}
+        return_data = get_source_popularity()
 
         return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
@@ -97,71 +62,33 @@ class DailyAIUsageAPIView(GenericAPIView):
 
     permission_classes = [IsSuperAdmin]
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("start_date", openapi.IN_QUERY, description="First day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter("end_date", openapi.IN_QUERY, description="Last day (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+        ]
+    )
     def get(self, request):
-        def parse_date(date_str):
-            if not date_str:
-                return None
-            try:
-                return datetime.strptime(date_str, "%Y-%m-%d").date()
-            except ValueError:
-                return None
-
-        dates_qs = (
-            AIAnalytics.objects.filter(is_active=True)
-            .annotate(date=TruncDate("created"))
-            .values("date")
-            .order_by("-date")
-            .distinct()
-        )[:5]
-
-        # Extract the date objects from the QuerySet
-        last_5_dates = [row["date"] for row in dates_qs]
-
-        # --- 2. Filter aggregation to only include the last 5 dates ---
-        if not last_5_dates:
-            return_data = {"dates": [], "series": [], "total_calls": 0, "totals_by_type": {}}
-            return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
-
-        # Filter the main QuerySet by the last 5 dates
-        analytics_qs = AIAnalytics.objects.filter(is_active=True, created__date__in=last_5_dates)
-
-        # Aggregate data only for those 5 dates
-        aggregated = list(
-            analytics_qs
-            .annotate(date=TruncDate("created"))
-            .values("date", "generation_type")
-            .annotate(count=Count("id"))
-            .order_by("date", "generation_type")
-        )
+        start_date = parse_date(request.query_params.get("start_date"))
+        end_date = parse_date(request.query_params.get("end_date"))
+
+        return_data = get_daily_ai_usage(start_date, end_date)
+
+        return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
-        date_list = sorted(last_5_dates)
-        date_labels = [date.strftime("%Y-%m-%d") for date in date_list]
-        date_index = {date: idx for idx, date in enumerate(date_list)}
-
-        series_map = defaultdict(lambda: [0] * len(date_list))
-        totals_by_type = defaultdict(int)
-        for row in aggregated:
-            # Check if the row's date is in the final list, though it should be due to filtering
-            if row["date"] in date_index:
-                idx = date_index[row["date"]]
-                gen_type = row["generation_type"]
-                count = row["count"]
-                series_map[gen_type][idx] = count
-                totals_by_type[gen_type] += count
-
-        totals_by_type = dict(totals_by_type)
-        total_calls = sum(totals_by_type.values())
-        series = [
-            {"label": gen_type, "data": counts}
-            for gen_type, counts in series_map.items()
-        ]
 
-        return_data = {
-            "dates": date_labels,
-            "series": series,
-            "total_calls": total_calls,
-            "totals_by_type": totals_by_type,
-        }
+class DashboardSummaryAPIView(GenericAPIView):
+    """
+    Returns the counts, registration trend, source popularity and daily AI usage of the
+    super admin dashboard in one response, cached until one of the underlying tables changes.
+    """
+
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request):
+        summary = get_dashboard_summary()
+
+        return_data = {**summary, "counts": format_dashboard_counts(summary["counts"])}
 
         return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
 
@@ -171,9 +98,7 @@ class CreditRemainingAPIView(GenericAPIView):
 
     def get(self, request):
 
-        credits_used = AIAnalytics.objects.filter(user_id = request.user.id).count()
-
-        credits_remaining = 100 - credits_used
+        credits_remaining = get_user_credit(request.user.id).balance
 
         return_data = {"credits_remaining": credits_remaining}
 
@@ -182,14 +107,19 @@ class CreditRemainingAPIView(GenericAPIView):
 
 class APICallListFilter(ListAPIView):
     serializer_class = AIAnalyticsListFilterDisplaySerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-created", "-pk")
 
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsUser]
 
     def get_queryset(self):
 
-        ai_analytics_queryset = AIAnalytics.objects.filter(is_active=True, user_id=self.request.user.id).order_by("-created")
+        ai_analytics_queryset = (
+            AIAnalytics.objects
+            .filter(is_active=True, user_id=self.request.user.id)
+            .only("pk", "generation_type", "content_preview", "content_size", "created")
+            .order_by("-created")
+        )
 
         # Filter by generation_type
         generation_type = self.request.query_params.get("generation_type", None)
@@ -208,5 +138,25 @@ class APICallListFilter(ListAPIView):
         return self.list(request, *args, **kwargs)
 
 
+class APICallDetailAPIView(GenericAPIView):
+    """Stream the full content of one of the user's AI generations"""
+
+    permission_classes = [IsUser]
 
+    def get(self, request, pk):
+        # The content is streamed from the blob in chunks; only rows predating the blobs load it here
+        ai_analytics = (
+            AIAnalytics.objects
+            .defer("content")
+            .filter(pk=pk, is_active=True, user_id=request.user.id)
+            .first()
+        )
+        if not ai_analytics:
+            return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(iter_ai_analytics_content(ai_analytics), content_type="text/plain; charset=utf-8")
+        response["X-Generation-Type"] = ai_analytics.generation_type
+        if ai_analytics.content_size:
+            response["Content-Length"] = ai_analytics.content_size
+        return response
 
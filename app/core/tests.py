@@ -1,3 +1,104 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from app.core.views import KeysetPagination
+from app.job_source.models import Source
+
+
+class SourceListView:
+    keyset_ordering = ("-updated", "-pk")
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        # Pairs of sources share an updated timestamp, so pages must break ties on pk
+        for index in range(7):
+            source = Source.objects.create(name=f"Source {index}")
+            Source.objects.filter(pk=source.pk).update(updated=now - timedelta(minutes=index // 2))
+        self.expected = list(Source.objects.order_by("-updated", "-pk").values_list("pk", flat=True))
+
+    def _page(self, url):
+        paginator = KeysetPagination()
+        results = paginator.paginate_queryset(Source.objects.all(), Request(APIRequestFactory().get(url)),
+                                              view=SourceListView())
+        response = paginator.get_paginated_response([source.pk for source in results])
+        return response.data
+
+    def test_next_cursors_walk_every_row_once_in_order(self):
+        seen, url = [], "/sources?size=3"
+        while url:
+            page = self._page(url)
+            seen.extend(page["results"])
+            url = page["next"]
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        first = self._page("/sources?size=3")
+        second = self._page(first["next"])
+        self.assertIsNone(first["previous"])
+        self.assertEqual(second["results"], self.expected[3:6])
+        self.assertEqual(self._page(second["previous"])["results"], first["results"])
+
+    def test_cursor_is_stable_under_inserts_before_it(self):
+        first = self._page("/sources?size=3")
+        Source.objects.create(name="Newest")
+        self.assertEqual(self._page(first["next"])["results"], self.expected[3:6])
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self._page("/sources?size=1000")["results"]), 7)
+        self.assertEqual(len(self._page("/sources?size=0")["results"]), 1)
+
+    def test_invalid_cursor_is_not_found(self):
+        with self.assertRaises(NotFound):
+            self._page("/sources?cursor=not-a-cursor")
+
+
+@skipUnless(connection.vendor == "postgresql", "The indexes are Postgres-specific")
+class IndexPlanTestCase(TestCase):
+    """
+    Base class for tests that the queries of list endpoints are answered from their indexes.
+
+    Subclasses fill their tables in setUpTestData and call analyze() so the planner has
+    realistic statistics; sequential scans are disabled as a tie-breaker on small tables.
+    """
+
+    @staticmethod
+    def analyze(*models):
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def explain_page(self, view_class, user=None, **params):
+        """Plan of the page query a list view runs: its get_queryset() through its paginator."""
+        request = Request(APIRequestFactory().get("/", params))
+        request.user = user
+        view = view_class(request=request, format_kwarg=None, args=(), kwargs={})
+        with CaptureQueriesContext(connection) as queries:
+            view.paginator.paginate_queryset(view.get_queryset(), request, view=view)
+        return self.explain(queries[-1]["sql"])
 
-# Create your tests here.
+    def assertUsesIndex(self, plan, index_name):
+        self.assertIn(index_name, plan)
+        self.assertNotIn("Seq Scan", plan)
@@ -1,5 +1,16 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q
 from django.shortcuts import render
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 
 # Create your views here.
@@ -24,4 +35,114 @@ class CustomPageNumberPagination(PageNumberPagination):
         paginator = self.django_paginator_class(queryset, self.page_size)
         self.page = paginator.get_page(page_number)
 
-        return self.page
\ No newline at end of file
+        return self.page
+
+class KeysetPagination(BasePagination):
+    """
+        Cursor pagination keyed on (timestamp, pk) instead of COUNT(*) + OFFSET.
+
+        Each page is fetched with a `WHERE (field, pk) < (last field, last pk)` range condition,
+        so deep pages cost the same as the first one. Cursors are opaque base64 tokens.
+        Views choose their key with a `keyset_ordering` attribute, e.g. ("-updated", "-pk").
+        Pass `include_total=true` for an approximate total taken from the query planner.
+    """
+
+    page_size_query_param = 'size'
+    cursor_query_param = 'cursor'
+    max_page_size = 100
+    ordering = ('-created', '-pk')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.count = self.get_approximate_count(queryset) if self._include_total(request) else None
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering if not reverse else [self._invert(field) for field in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, ordering))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Moving backwards, there is always a next page (the one we came from)
+        has_next = has_more if not reverse else position is not None
+        has_previous = position is not None if not reverse else has_more
+
+        self.next_position = self._position(results[-1]) if results and has_next else None
+        self.previous_position = self._position(results[0]) if results and has_previous else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.encode_cursor(self.next_position, reverse=False)),
+            ('previous', self.encode_cursor(self.previous_position, reverse=True)),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, api_settings.PAGE_SIZE))
+        except (TypeError, ValueError):
+            return api_settings.PAGE_SIZE
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_approximate_count(self, queryset):
+        """Row estimate from the planner; None when the database cannot provide one."""
+        if connection.vendor != 'postgresql':
+            return None
+        try:
+            plan = json.loads(queryset.order_by().explain(format='json'))
+            return plan[0]['Plan']['Plan Rows']
+        except Exception:
+            return None
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            field_name = self.ordering[0].lstrip('-')
+            value = model._meta.get_field(field_name).to_python(payload['p'][0])
+            pk = model._meta.pk.to_python(payload['p'][1])
+            return (value, pk), bool(payload['r'])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        if position is None:
+            return None
+        value, pk = position
+        # isoformat keeps full microsecond precision (DjangoJSONEncoder truncates to milliseconds)
+        value = value.isoformat() if hasattr(value, 'isoformat') else value
+        payload = json.dumps({'p': [value, pk], 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def _include_total(self, request):
+        return request.query_params.get('include_total', '').lower() in ('1', 'true')
+
+    def _position(self, obj):
+        return [getattr(obj, self.ordering[0].lstrip('-')), obj.pk]
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _after(position, ordering):
+        """Rows strictly after `position` in the given (field, pk) ordering."""
+        value, pk = position
+        field = ordering[0].lstrip('-')
+        field_lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        pk_lookup = 'lt' if ordering[1].startswith('-') else 'gt'
+        return Q(**{f'{field}__{field_lookup}': value}) | Q(**{field: value, f'pk__{pk_lookup}': pk})
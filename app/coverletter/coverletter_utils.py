@@ -1,10 +1,7 @@
-import os
-from typing import Optional
+from app.llm.llm_utils import complete
 
-from dotenv import load_dotenv
-from groq import Groq
-
-load_dotenv()
+# Resume profile sections the cover letter prompt needs
+COVER_LETTER_SECTIONS = ("contact", "skills", "experience", "projects")
 
 
 def generate_cover_letter(resume_text: str, job_description: str, tone="Professional") -> str:
@@ -44,11 +41,5 @@ def generate_cover_letter(resume_text: str, job_description: str, tone="Professi
     if tone:
         prompt += f"\n\nTone: Write the cover letter in a {tone} tone."
 
-        # --- GROQ LLM integration example ---
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    html_content = response.choices[0].message.content.strip()
-    return html_content
+    # --- LLM gateway ---
+    return complete(prompt)
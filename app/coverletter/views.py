@@ -5,11 +5,12 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 
-from app.analytics.analytics_utils import save_ai_analytics
+from app.analytics.analytics_utils import credit_required, save_ai_analytics
 from app.analytics.models import AIAnalytics
-from app.coverletter.coverletter_utils import generate_cover_letter
+from app.coverletter.coverletter_utils import generate_cover_letter, COVER_LETTER_SECTIONS
 from app.global_constants import ErrorMessage, SuccessMessage
-from app.portfolio.portfolio_utils import get_file_type, extract_resume_text
+from app.portfolio.portfolio_utils import get_file_type
+from app.resume.resume_utils import get_resume_context
 from app.utils import get_response_schema
 
 
@@ -25,6 +26,7 @@ class CoverletterAPIView(GenericAPIView):
             }
         )
     )
+    @credit_required
     def post(self, request):
         # Check if the user has resume file
         if not request.user.resume_file:
@@ -38,7 +40,7 @@ class CoverletterAPIView(GenericAPIView):
         tone = request.data.get("tone")
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -46,7 +48,7 @@ class CoverletterAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, COVER_LETTER_SECTIONS)
 
         cover_letter = generate_cover_letter(resume_text, job_description, tone)
 
@@ -1,9 +1,10 @@
 from rest_framework import status
 from rest_framework.views import exception_handler
-from rest_framework.exceptions import Throttled, PermissionDenied, NotAuthenticated
+from rest_framework.exceptions import Throttled, PermissionDenied, NotAuthenticated, ValidationError
 from django.conf import settings
 
 from app.global_constants import ErrorMessage
+from app.portfolio.pdf_utils import PdfExtractionError, PdfExtractionTimeout
 from app.utils import get_response_schema
 
 
@@ -28,4 +29,21 @@ def custom_exception_handler(exc, context):
             ErrorMessage.UNAUTHORIZED,
             NotAuthenticated.status_code
         )
+    if isinstance(exc, ValidationError):
+        # Raised outside a view's serializer check, e.g. by ResumeMultiPartParser
+        return get_response_schema(exc.detail, ErrorMessage.BAD_REQUEST, ValidationError.status_code)
+
+    if isinstance(exc, PdfExtractionTimeout):
+        return get_response_schema(
+            {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.RESUME_PROCESSING_TIMEOUT.value]},
+            ErrorMessage.RESUME_PROCESSING_TIMEOUT,
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    if isinstance(exc, PdfExtractionError):
+        return get_response_schema(
+            {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.RESUME_FILE_UNREADABLE.value]},
+            ErrorMessage.BAD_REQUEST,
+            status.HTTP_400_BAD_REQUEST
+        )
+
     return exception_handler(exc, context)
@@ -0,0 +1,174 @@
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app.analytics.analytics_utils import release_credit, save_ai_analytics
+from app.analytics.models import AIAnalytics
+from app.generation.models import GenerationJob
+from app.portfolio.portfolio_utils import generate_portfolio_from_qna, process_resume
+from app.resume.resume_utils import generate_latex_prompt, get_resume_text
+
+logger = logging.getLogger('django')
+
+
+def _generate_portfolio_from_resume(job) -> Dict:
+    return {"html": process_resume(get_resume_text(job.user))}
+
+
+def _generate_portfolio_from_qna(job) -> Dict:
+    return {"html": generate_portfolio_from_qna(job.payload)}
+
+
+def _generate_resume(job) -> Dict:
+    return {"resume": generate_latex_prompt(job.payload)}
+
+
+# Generation type -> (generator, key of the result to record in AI analytics)
+GENERATORS = {
+    AIAnalytics.GenerationType.PORTFOLIO_FROM_RESUME: (_generate_portfolio_from_resume, "html"),
+    AIAnalytics.GenerationType.PORTFOLIO_FROM_QNA: (_generate_portfolio_from_qna, "html"),
+    AIAnalytics.GenerationType.RESUME: (_generate_resume, "resume"),
+}
+
+
+def enqueue_generation_job(user, generation_type, payload: Optional[Dict] = None) -> GenerationJob:
+    """Queue a generation for the worker; the caller has already reserved the user's credit."""
+    return GenerationJob.objects.create(user_id=user.id, generation_type=generation_type, payload=payload or {})
+
+
+def claim_next_job() -> Optional[GenerationJob]:
+    """
+    Mark the oldest pending job as running and return it, or None when the queue is empty.
+
+    SKIP LOCKED lets several workers claim jobs concurrently without waiting on each other.
+    """
+    with transaction.atomic():
+        job = (
+            GenerationJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=GenerationJob.Status.PENDING)
+            .order_by("created")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = GenerationJob.Status.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.attempts = F("attempts") + 1
+        job.save(update_fields=["status", "started_at", "heartbeat_at", "attempts", "updated"])
+
+    job.refresh_from_db(fields=["attempts"])
+    return job
+
+
+def _claimed(job):
+    """The job's row, as long as it is still running under this claim (not requeued and reclaimed)."""
+    return GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.Status.RUNNING, attempts=job.attempts)
+
+
+@contextmanager
+def _heartbeat(job):
+    """Refresh the job's heartbeat every GENERATION_JOB_HEARTBEAT_INTERVAL seconds while the block runs."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.GENERATION_JOB_HEARTBEAT_INTERVAL):
+                try:
+                    _claimed(job).update(heartbeat_at=timezone.now())
+                except Exception as e:
+                    logger.warning(f"Heartbeat of generation job {job.pk} failed: {str(e)}")
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"generation-heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _finish_job(job, stale_before=None, **fields) -> bool:
+    """
+    Record the outcome of a claimed job; False when the claim was lost meanwhile.
+
+    With `stale_before`, the job is only finished if its heartbeat is still older.
+    """
+    now = timezone.now()
+    claimed = _claimed(job)
+    if stale_before is not None:
+        claimed = claimed.filter(heartbeat_at__lt=stale_before)
+    if not claimed.update(finished_at=now, updated=now, **fields):
+        return False
+
+    job.finished_at = now
+    for field, value in fields.items():
+        setattr(job, field, value)
+    return True
+
+
+def _fail_job(job, error: str, stale_before=None):
+    if _finish_job(job, stale_before, status=GenerationJob.Status.FAILED, error=error):
+        # Only successful generations are charged
+        release_credit(job.user_id)
+
+
+def run_generation_job(job):
+    """
+    Run a claimed job and store its result; a failed job gives the reserved credit back.
+
+    The job's heartbeat is refreshed while the generator runs. If the job was requeued
+    meanwhile, its outcome is discarded so the job is neither charged nor released twice.
+    """
+    generator, content_key = GENERATORS[job.generation_type]
+    try:
+        with _heartbeat(job):
+            result = generator(job)
+    except Exception as e:
+        logger.error(f"Generation job {job.pk} failed: {str(e)}", exc_info=True)
+        _fail_job(job, str(e))
+        return
+
+    if _finish_job(job, status=GenerationJob.Status.SUCCEEDED, result=result):
+        save_ai_analytics(job.user, job.generation_type, result[content_key])
+    else:
+        logger.warning(f"Generation job {job.pk} was requeued while running; discarding its result")
+
+
+def recover_stale_jobs() -> int:
+    """
+    Requeue jobs whose worker died mid-run, or fail them once they are out of attempts.
+
+    A running job counts as stale when its heartbeat is older than GENERATION_JOB_HEARTBEAT_TIMEOUT;
+    a slow job whose worker is alive keeps its heartbeat fresh and is left alone. The heartbeat
+    is re-checked by each UPDATE, so a job that beats meanwhile is not requeued.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_HEARTBEAT_TIMEOUT)
+    stale_jobs = GenerationJob.objects.filter(status=GenerationJob.Status.RUNNING, heartbeat_at__lt=stale_before)
+
+    requeued = stale_jobs.filter(attempts__lt=settings.GENERATION_JOB_MAX_ATTEMPTS).update(
+        status=GenerationJob.Status.PENDING, started_at=None, heartbeat_at=None, updated=timezone.now()
+    )
+    for job in stale_jobs.filter(attempts__gte=settings.GENERATION_JOB_MAX_ATTEMPTS):
+        _fail_job(job, "Generation timed out.", stale_before)
+
+    return requeued
+
+
+def prune_finished_jobs() -> int:
+    """Delete finished jobs older than GENERATION_JOB_RETENTION_DAYS; the content stays in AI analytics."""
+    cutoff = timezone.now() - timedelta(days=settings.GENERATION_JOB_RETENTION_DAYS)
+    deleted, _ = GenerationJob.objects.filter(
+        status__in=[GenerationJob.Status.SUCCEEDED, GenerationJob.Status.FAILED], finished_at__lt=cutoff
+    ).delete()
+    return deleted
@@ -0,0 +1,54 @@
+import logging
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.generation.generation_utils import claim_next_job, prune_finished_jobs, recover_stale_jobs, \
+    run_generation_job
+
+logger = logging.getLogger('django')
+
+
+class Command(BaseCommand):
+    help = "Run queued AI generation jobs. Several workers can run side by side."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep waiting for new jobs until stopped.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.GENERATION_WORKER_POLL_INTERVAL,
+            help="Seconds to wait before checking again when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        # On SIGTERM finish the running job, then exit normally so buffered analytics are flushed
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
+        next_maintenance = 0.0
+        while not stopping.is_set():
+            close_old_connections()
+            try:
+                if time.monotonic() >= next_maintenance:
+                    recover_stale_jobs()
+                    prune_finished_jobs()
+                    next_maintenance = time.monotonic() + settings.GENERATION_JOB_HEARTBEAT_TIMEOUT / 2
+
+                job = claim_next_job()
+                if job is not None:
+                    run_generation_job(job)
+                    self.stdout.write(f"Generation job {job.pk} finished with status {job.status}.")
+                    continue
+            except Exception as e:
+                if not options["loop"]:
+                    raise
+                logger.error(f"Generation worker failed: {e}")
+
+            if not options["loop"]:
+                break
+            stopping.wait(options["interval"])
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from app.analytics.models import AIAnalytics
+
+
+# Create your models here.
+
+class GenerationJob(models.Model):
+    """ Model: long-running AI generation, queued by the API and run by the generation worker """
+
+    class Status(models.TextChoices):
+        PENDING = "Pending", _("Pending")
+        RUNNING = "Running", _("Running")
+        SUCCEEDED = "Succeeded", _("Succeeded")
+        FAILED = "Failed", _("Failed")
+
+    # Foreign key
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="generation_jobs",
+        related_query_name="generation_job"
+    )
+
+    # Field declarations
+    generation_type = models.CharField(max_length=50, choices=AIAnalytics.GenerationType.choices)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    payload = models.JSONField(default=dict, blank=True)  # request data the generator needs
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)  # refreshed by the worker while it runs
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    # Additional Fields
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Worker queue: oldest pending job first
+            models.Index(fields=["created"], condition=models.Q(status="Pending"), name="generationjob_pending"),
+            # Stale job recovery: running jobs by last heartbeat
+            models.Index(fields=["heartbeat_at"], condition=models.Q(status="Running"), name="generationjob_running"),
+        ]
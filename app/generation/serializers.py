@@ -0,0 +1,10 @@
+from rest_framework import serializers
+
+from app.generation.models import GenerationJob
+
+
+class GenerationJobDisplaySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = GenerationJob
+        fields = ('pk', 'generation_type', 'status', 'result', 'error', 'created', 'started_at', 'finished_at')
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.analytics.models import AIAnalytics, UserCredit
+from app.generation.generation_utils import GENERATORS, claim_next_job, enqueue_generation_job, recover_stale_jobs, \
+    run_generation_job
+from app.generation.models import GenerationJob
+from app.global_constants import RoleConstants
+from app.role.models import Role
+from app.user.authentication import ClaimsRefreshToken
+
+
+@override_settings(GENERATION_JOB_HEARTBEAT_TIMEOUT=120, GENERATION_JOB_MAX_ATTEMPTS=2)
+class GenerationJobTests(TestCase):
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user("generation@example.com", "password", role=role)
+        UserCredit.objects.create(user=self.user, balance=4)
+
+    def _enqueue(self):
+        return enqueue_generation_job(self.user, AIAnalytics.GenerationType.RESUME, {"name": "A"})
+
+    def _make_stale(self, job):
+        GenerationJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+
+    def test_claims_oldest_pending_job_once(self):
+        first, second = self._enqueue(), self._enqueue()
+
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, GenerationJob.Status.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNotNone(claimed.heartbeat_at)
+
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_job_is_requeued_and_reclaimed(self):
+        self._enqueue()
+        job = claim_next_job()
+        self._make_stale(job)
+
+        self.assertEqual(recover_stale_jobs(), 1)
+        reclaimed = claim_next_job()
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_job_with_fresh_heartbeat_is_left_running(self):
+        self._enqueue()
+        job = claim_next_job()
+        GenerationJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(recover_stale_jobs(), 0)
+        self.assertEqual(GenerationJob.objects.get(pk=job.pk).status, GenerationJob.Status.RUNNING)
+
+    def test_stale_job_out_of_attempts_fails_and_releases_credit(self):
+        self._enqueue()
+        job = claim_next_job()
+        GenerationJob.objects.filter(pk=job.pk).update(attempts=2)
+        self._make_stale(job)
+
+        recover_stale_jobs()
+
+        self.assertEqual(GenerationJob.objects.get(pk=job.pk).status, GenerationJob.Status.FAILED)
+        self.assertEqual(UserCredit.objects.get(user=self.user).balance, 5)
+
+    @mock.patch("app.generation.generation_utils.save_ai_analytics")
+    def test_result_of_a_requeued_claim_is_discarded(self, save_ai_analytics):
+        self._enqueue()
+        stale_claim = claim_next_job()
+        self._make_stale(stale_claim)
+        recover_stale_jobs()
+        claim_next_job()
+
+        generator = mock.Mock(return_value={"resume": "tex"})
+        with mock.patch.dict(GENERATORS, {AIAnalytics.GenerationType.RESUME: (generator, "resume")}):
+            run_generation_job(stale_claim)
+
+        job = GenerationJob.objects.get(pk=stale_claim.pk)
+        self.assertEqual(job.status, GenerationJob.Status.RUNNING)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(UserCredit.objects.get(user=self.user).balance, 4)
+        save_ai_analytics.assert_not_called()
+
+    @mock.patch("app.generation.generation_utils.save_ai_analytics")
+    def test_successful_job_stores_result(self, save_ai_analytics):
+        self._enqueue()
+        job = claim_next_job()
+
+        generator = mock.Mock(return_value={"resume": "tex"})
+        with mock.patch.dict(GENERATORS, {AIAnalytics.GenerationType.RESUME: (generator, "resume")}):
+            run_generation_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.SUCCEEDED)
+        self.assertEqual(job.result, {"resume": "tex"})
+        save_ai_analytics.assert_called_once_with(job.user, AIAnalytics.GenerationType.RESUME, "tex")
+
+    @mock.patch("app.generation.generation_utils.save_ai_analytics")
+    def test_failed_job_releases_credit(self, save_ai_analytics):
+        self._enqueue()
+        job = claim_next_job()
+
+        generator = mock.Mock(side_effect=RuntimeError("LLM down"))
+        with mock.patch.dict(GENERATORS, {AIAnalytics.GenerationType.RESUME: (generator, "resume")}):
+            run_generation_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.FAILED)
+        self.assertEqual(job.error, "LLM down")
+        self.assertEqual(UserCredit.objects.get(user=self.user).balance, 5)
+        save_ai_analytics.assert_not_called()
+
+
+class GenerationPermissionTests(TestCase):
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.SUPER_ADMIN.value, name="Super Admin")
+        admin = get_user_model().objects.create_user("admin@example.com", "password", role=role)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(admin).access_token}")
+
+    def test_only_users_can_enqueue_the_jobs_they_can_poll(self):
+        # Super admins cannot poll api/jobs/<job_id>, so they cannot enqueue either
+        for url in ("/api/portfolio/generate-from-resume", "/api/portfolio/generate-from-qna",
+                    "/api/resume/generate"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url, {}, format="json").status_code, 403)
+        self.assertFalse(GenerationJob.objects.exists())
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from app.generation.views import GenerationJobDetailAPIView
+
+urlpatterns = [
+    path("<int:pk>", GenerationJobDetailAPIView.as_view(), name="generation-job-detail"),
+]
@@ -0,0 +1,22 @@
+from rest_framework import status
+from rest_framework.generics import GenericAPIView
+
+from app.generation.models import GenerationJob
+from app.generation.serializers import GenerationJobDisplaySerializer
+from app.global_constants import ErrorMessage, SuccessMessage
+from app.utils import get_response_schema
+from permissions import IsUser
+
+
+class GenerationJobDetailAPIView(GenericAPIView):
+    """Status, and once finished the result, of one of the user's generation jobs"""
+
+    permission_classes = [IsUser]
+
+    def get(self, request, pk):
+        job = GenerationJob.objects.filter(pk=pk, user_id=request.user.id).first()
+        if not job:
+            return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+        serializer = GenerationJobDisplaySerializer(job)
+        return get_response_schema(serializer.data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
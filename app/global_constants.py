@@ -9,6 +9,9 @@ class SuccessMessage(str, Enum):
 
     CREDENTIALS_MATCHED = "Login successful."
     CREDENTIALS_REMOVED = "Logout successful."
+    TOKEN_REFRESHED = "Token refreshed successfully."
+
+    GENERATION_QUEUED = "Generation queued."
 
 
 class ErrorMessage(str, Enum):
@@ -18,6 +21,7 @@ class ErrorMessage(str, Enum):
     FORBIDDEN = "Not Authorized."
     NOT_FOUND = "Resource not found."
     UNAUTHORIZED = "Not Authenticated"
+    TOKEN_INVALID = "Token is invalid or expired."
 
     PASSWORD_MISMATCH = "Password Mismatch."
     MISSING_FIELDS = "Fields Missing"
@@ -26,6 +30,11 @@ class ErrorMessage(str, Enum):
 
     RESUME_FILE_MISSING = "Resume file is required."
     UNSUPPORTED_FILE_TYPE = "Unsupported file type. Only PDF and DOCX allowed."
+    RESUME_FILE_TOO_LARGE = "Resume file is too large."
+    RESUME_FILE_UNREADABLE = "Resume file could not be read. Please upload it again."
+    RESUME_PROCESSING_TIMEOUT = "Resume is taking too long to process, please try again later."
+
+    INSUFFICIENT_CREDITS = "Not enough credits remaining."
 
 class GlobalValues(int, Enum):
 
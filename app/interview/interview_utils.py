@@ -1,13 +1,9 @@
-import os
 from typing import List, Dict
-import json
 
-from dotenv import load_dotenv
-from groq import Groq
+from app.llm.llm_utils import complete_json
 
-load_dotenv()
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Resume profile sections the interview prompts need
+INTERVIEW_SECTIONS = ("skills", "experience", "projects")
 
 def generate_interview_questions(
         resume_text: str,
@@ -63,21 +59,12 @@ Return only a JSON array of 5 objects, for example:
 - Return only JSON, no extra text or explanations.
 """
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
+    # fallback in case parsing fails
+    return complete_json(
+        prompt,
+        fallback=lambda content: [{"text": content, "type": question_type, "context": ""}],
     )
 
-    content = response.choices[0].message.content.strip()
-
-    try:
-        questions = json.loads(content)
-    except json.JSONDecodeError:
-        # fallback in case parsing fails
-        questions = [{"text": content, "type": question_type, "context": ""}]
-
-    return questions
-
 
 def generate_interview_score(
     resume_text: str,
@@ -146,17 +133,4 @@ Return only a JSON object in this exact format:
 - Return only JSON; do not add extra text or explanations.
 """
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    content = response.choices[0].message.content.strip()
-
-    try:
-        result_json = json.loads(content)
-    except json.JSONDecodeError:
-        # fallback if JSON parsing fails
-        result_json = {"raw_text": content}
-
-    return result_json
+    return complete_json(prompt)
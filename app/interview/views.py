@@ -5,11 +5,12 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 
-from app.analytics.analytics_utils import save_ai_analytics
+from app.analytics.analytics_utils import credit_required, save_ai_analytics
 from app.analytics.models import AIAnalytics
 from app.global_constants import ErrorMessage, SuccessMessage
-from app.interview.interview_utils import generate_interview_questions, generate_interview_score
-from app.portfolio.portfolio_utils import get_file_type, extract_resume_text
+from app.interview.interview_utils import generate_interview_questions, generate_interview_score, INTERVIEW_SECTIONS
+from app.portfolio.portfolio_utils import get_file_type
+from app.resume.resume_utils import get_resume_context
 from app.utils import get_response_schema
 from permissions import IsUser
 
@@ -29,6 +30,7 @@ class GenerateQuestionsAPIView(GenericAPIView):
             }
         )
     )
+    @credit_required
     def post(self, request):
         # Check if the user has resume file
         if not request.user.resume_file:
@@ -42,7 +44,7 @@ class GenerateQuestionsAPIView(GenericAPIView):
         question_type = request.data.get("question_type")
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -50,7 +52,7 @@ class GenerateQuestionsAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, INTERVIEW_SECTIONS)
 
         question_list = generate_interview_questions(resume_text, job_description, question_type)
 
@@ -90,6 +92,7 @@ class AnswerQuestionsAPIView(GenericAPIView):
             required=["questions", "job_description"]
         )
     )
+    @credit_required
     def post (self, request):
 
         # Check if the user has resume file
@@ -104,7 +107,7 @@ class AnswerQuestionsAPIView(GenericAPIView):
         question_list = request.data.get("questions")
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -112,7 +115,7 @@ class AnswerQuestionsAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, INTERVIEW_SECTIONS)
 
         interview_score = generate_interview_score(resume_text, job_description, question_list)
 
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
 
 
 class JobSourceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.job_source'
+
+    def ready(self):
+        from app.job_source.signals import create_trigram_extension
+
+        pre_migrate.connect(create_trigram_extension, sender=self, dispatch_uid="job_source_trigram_extension")
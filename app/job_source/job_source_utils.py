@@ -1,32 +1,254 @@
-import os
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 import feedparser
-from dotenv import load_dotenv
-from groq import Groq
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
 
-import json
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from app.job_source.models import JobPosting, Source, UserSource
+from app.llm.llm_utils import complete_json
+
+logger = logging.getLogger('django')
+
+# Bounded pool shared by every recommendation request in this worker process
+_executor = ThreadPoolExecutor(max_workers=settings.JOB_MATCH_MAX_WORKERS, thread_name_prefix="job-match")
+
+# Resume profile sections the job matching prompt needs
+JOB_MATCH_SECTIONS = ("skills", "experience")
+
+# Lexical pre-ranking
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+STOP_WORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "will", "with", "you", "your",
+))
 
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+def _entry_to_job(entry) -> Dict:
+    """Convert a feedparser entry into a job dict."""
+    published_parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    return {
+        "title": entry.title,
+        "description": entry.get("summary", ""),
+        "link": entry.link,
+        "published": entry.get("published", ""),
+        "published_at": datetime(*published_parsed[:6], tzinfo=dt_timezone.utc) if published_parsed else None,
+    }
+
+
+def hash_link(link: str) -> str:
+    """Return the SHA-256 used to deduplicate job postings by link."""
+    return hashlib.sha256(link.strip().encode("utf-8")).hexdigest()
+
+
+def save_job_postings(source, jobs: List[Dict]) -> int:
+    """Insert new postings for a source and refresh already-known ones, deduplicated by link hash."""
+    postings = {}
+    for job in jobs:
+        if not job.get("link") or not job.get("title"):
+            continue
+        link_hash = hash_link(job["link"])
+        postings[link_hash] = JobPosting(
+            source=source,
+            link=job["link"][:2000],
+            link_hash=link_hash,
+            title=job["title"][:500],
+            description=job.get("description", ""),
+            published=job.get("published", "")[:100],
+            published_at=job.get("published_at"),
+        )
+
+    JobPosting.objects.bulk_create(
+        postings.values(),
+        update_conflicts=True,
+        unique_fields=["link_hash"],
+        update_fields=["title", "description", "published", "published_at", "updated", "is_active"],
+    )
+    return len(postings)
 
-load_dotenv()
 
+def _next_poll_interval(current: Optional[int], changed: bool) -> int:
+    """Poll twice as often after a feed changed and back off by half otherwise, within bounds."""
+    interval = current or settings.JOB_FEED_POLL_INTERVAL
+    interval = interval / 2 if changed else interval * 1.5
+    return int(min(max(interval, settings.JOB_FEED_MIN_POLL_INTERVAL), settings.JOB_FEED_MAX_POLL_INTERVAL))
 
-def fetch_jobs_from_rss(url: str, limit: int = 5):
+
+def ingest_source(source) -> int:
+    """
+    Download one source's RSS feed into the JobPosting store.
+
+    The stored ETag / Last-Modified are sent back so an unchanged feed answers 304
+    without a body, and entries published before the source's watermark are skipped.
+    They are only replaced by the validators of a successful (200) response.
+    The source's poll interval adapts to whether the feed brought a posting whose link
+    was not stored yet, so undated entries do not count as news on every poll.
+    """
+    now = timezone.now()
+    feed = feedparser.parse(source.rss_url, etag=source.etag or None, modified=source.last_modified or None)
+    status = feed.get("status")
+
+    saved = 0
+    new_postings = 0
+    watermark = source.last_entry_published
+    if status != 304:
+        jobs = [_entry_to_job(entry) for entry in feed.entries if entry.get("link") and entry.get("title")]
+        if source.last_entry_published:
+            jobs = [job for job in jobs if not job["published_at"] or job["published_at"] > source.last_entry_published]
+        link_hashes = {hash_link(job["link"]) for job in jobs}
+        new_postings = len(link_hashes) - JobPosting.objects.filter(link_hash__in=link_hashes).count()
+        saved = save_job_postings(source, jobs)
+        published = [job["published_at"] for job in jobs if job["published_at"]]
+        if published:
+            watermark = max(published)  # only entries newer than the old watermark are left
+
+    etag, last_modified = source.etag, source.last_modified
+    if status == 200:
+        etag, last_modified = feed.get("etag", ""), feed.get("modified", "")
+
+    poll_interval = _next_poll_interval(source.poll_interval, changed=new_postings > 0)
+    Source.objects.filter(pk=source.pk).update(
+        etag=etag[:255],
+        last_modified=last_modified[:100],
+        last_fetched=now,
+        last_status=status,
+        last_entry_published=watermark,
+        poll_interval=poll_interval,
+        next_fetch_at=now + timedelta(seconds=poll_interval),
+    )
+    return saved
+
+
+def _defer_source(source):
+    """Back a failing source off like an unchanged one so it is not retried on every run."""
+    poll_interval = _next_poll_interval(source.poll_interval, changed=False)
+    Source.objects.filter(pk=source.pk).update(
+        last_fetched=timezone.now(),
+        last_status=None,
+        poll_interval=poll_interval,
+        next_fetch_at=timezone.now() + timedelta(seconds=poll_interval),
+    )
+
+
+def ingest_active_sources() -> int:
     """
-    Fetch a limited number of jobs from RSS feed to improve response speed.
+    Ingest the feed of every active source that is due for a poll and prune expired postings.
+
+    A failing feed is logged and skipped so it cannot block the other sources.
+    """
+    ingested = 0
+    due_sources = (
+        Source.objects
+        .filter(is_active=True)
+        .filter(Q(next_fetch_at__isnull=True) | Q(next_fetch_at__lte=timezone.now()))
+        .exclude(Q(rss_url__isnull=True) | Q(rss_url=""))
+    )
+    for source in due_sources:
+        try:
+            ingested += ingest_source(source)
+        except Exception as e:
+            logger.warning(f"Error ingesting feed from {source.name}: {e}")
+            _defer_source(source)
+
+    cutoff = timezone.now() - timedelta(days=settings.JOB_POSTING_RETENTION_DAYS)
+    JobPosting.objects.filter(updated__lt=cutoff).delete()
+
+    return ingested
+
+def refresh_source_counters(source_ids=None):
+    """
+    Recompute Source.subscriber_count and Source.active_alert_count from UserSource.
+
+    Pass the ids of the sources whose subscriptions changed, or None to reconcile every source.
     """
-    feed = feedparser.parse(url)
-    jobs = []
-    for entry in feed.entries[:limit]:  # limit to top N items
-        jobs.append({
-            "title": entry.title,
-            "description": entry.get("summary", ""),
-            "link": entry.link,
-            "published": entry.get("published", ""),
-        })
-    return jobs
+    subscriptions = UserSource.objects.filter(source=OuterRef("pk"), is_active=True).order_by().values("source")
+    subscriber_count = subscriptions.annotate(count=Count("user", distinct=True)).values("count")
+    active_alert_count = subscriptions.filter(alert=True).annotate(count=Count("id")).values("count")
+
+    sources = Source.objects.all() if source_ids is None else Source.objects.filter(pk__in=source_ids)
+    return sources.update(
+        subscriber_count=Coalesce(Subquery(subscriber_count), 0),
+        active_alert_count=Coalesce(Subquery(active_alert_count), 0),
+    )
+
+
+def dedupe_user_sources(batch_size: int = 1000) -> int:
+    """
+    Delete duplicate UserSource rows so that each (user, source) pair has one row.
+
+    Rows were once inserted without a duplicate check, so this must run before the
+    `usersource_user_source_unique` constraint is created, and so reads only columns
+    that predate it. The row kept for a pair is the active one updated most recently.
+    Returns the number of rows deleted.
+    """
+    ranked = UserSource.objects.annotate(rank=Window(
+        RowNumber(),
+        partition_by=[F("user_id"), F("source_id")],
+        order_by=[F("is_active").desc(), F("updated").desc(), F("pk").desc()],
+    ))
+    duplicates = list(ranked.filter(rank__gt=1).values_list("pk", flat=True))
+
+    for start in range(0, len(duplicates), batch_size):
+        UserSource.objects.filter(pk__in=duplicates[start:start + batch_size]).delete()
+
+    return len(duplicates)
+
+
+def sync_user_sources(user, items: List[Dict], deactivate_missing: bool = False) -> set:
+    """
+    Apply a user's source selections as a diff against their current UserSource rows.
+
+    New sources are inserted with one upsert, changed and re-selected rows are written with
+    one bulk_update, and with `deactivate_missing` the active rows absent from `items` are
+    deactivated in the same bulk_update. Returns the ids of the sources whose rows changed.
+    """
+    desired = {item["source"]: item for item in items}  # the last selection of a source wins
+    current = {user_source.source_id: user_source for user_source in UserSource.objects.filter(user=user)}
+    now = timezone.now()
+
+    to_create = []
+    to_update = []
+    for source_id, item in desired.items():
+        user_source = current.get(source_id)
+        if user_source is None:
+            to_create.append(UserSource(user=user, source_id=source_id, frequency=item["frequency"], alert=item["alert"]))
+        elif (user_source.frequency, user_source.alert, user_source.is_active) != (item["frequency"], item["alert"], True):
+            user_source.frequency, user_source.alert, user_source.is_active = item["frequency"], item["alert"], True
+            user_source.updated = now
+            to_update.append(user_source)
+
+    if deactivate_missing:
+        for source_id, user_source in current.items():
+            if source_id not in desired and user_source.is_active:
+                user_source.is_active = False
+                user_source.updated = now
+                to_update.append(user_source)
+
+    if to_create:
+        # A concurrent request may have inserted the same (user, source) meanwhile
+        UserSource.objects.bulk_create(
+            to_create,
+            update_conflicts=True,
+            unique_fields=["user", "source"],
+            update_fields=["frequency", "alert", "is_active", "updated"],
+        )
+    if to_update:
+        UserSource.objects.bulk_update(to_update, ["frequency", "alert", "is_active", "updated"])
+
+    return {user_source.source_id for user_source in to_create + to_update}
+
 
 def _truncate_text(text: str, max_chars: int = 4000) -> str:
     """
@@ -37,36 +259,91 @@ def _truncate_text(text: str, max_chars: int = 4000) -> str:
     return text[:max_chars]
 
 
-def match_jobs_to_resume(
-    user_resume_text: str,
-    jobs: List[Dict],
-    top_k: int = 5,
-    max_jobs_per_call: int = 5,
-    max_job_chars: int = 2000,
-) -> List[Dict]:
+def _tokenize(text: str) -> List[str]:
+    """Lower-case word tokens (keeping terms like c++, c# and node.js), without HTML tags or stop words."""
+    text = HTML_TAG_PATTERN.sub(" ", text or "").lower()
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOP_WORDS]
+
+
+def _resume_query_text(resume_text: str) -> str:
     """
-    Match user's resume with job descriptions using Groq LLM semantic scoring.
+    Return the words of the resume that the pre-ranker queries with.
 
-    Returns a list of top-k matched jobs with JSON structure:
-    [
-        {
-            "title": "Software Engineer",
-            "link": "https://example.com/job1?resume_prefilled=true",
-            "score": 87,
-            "keywords_matched": ["Python", "REST APIs", "Django"]
-        },
-        ...
-    ]
+    get_resume_context renders the profile as JSON. Only its values are kept, since keys
+    such as "skills", "role" or "company" appear in nearly every posting.
+    """
+    try:
+        context = json.loads(resume_text)
+    except (TypeError, ValueError):
+        return resume_text or ""
+
+    values = []
+    nodes = [context]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, dict):
+            nodes.extend(node.values())
+        elif isinstance(node, list):
+            nodes.extend(node)
+        elif node is not None:
+            values.append(str(node))
+    return " ".join(reversed(values))
+
+
+def prerank_jobs(resume_text: str, jobs: List[Dict], top_n: int, min_score: float = 0.0,
+                 k1: float = 1.5, b: float = 0.75) -> List[Dict]:
     """
+    Rank jobs against the resume locally with Okapi BM25 and keep the best candidates.
 
-    matched_jobs = []
+    The resume's distinct terms form the query and each job's title and description
+    form a document. The resume is raw text or the JSON profile context, of which
+    only the values are used. Jobs scoring at or below `min_score` (by default, jobs sharing
+    no term with the resume) are dropped, and at most `top_n` jobs are returned,
+    best first.
+    """
+    if not jobs:
+        return []
 
-    limited_jobs = jobs[:max_jobs_per_call]
+    documents = [_tokenize(f"{job.get('title', '')} {job.get('description', '')}") for job in jobs]
+    query_terms = set(_tokenize(_resume_query_text(resume_text)))
+    if not query_terms:
+        return jobs[:top_n]
+
+    document_count = len(documents)
+    average_length = sum(len(document) for document in documents) / document_count or 1.0
+    document_frequency = Counter()
+    for document in documents:
+        document_frequency.update(query_terms.intersection(document))
+
+    scored_jobs = []
+    for index, (job, document) in enumerate(zip(jobs, documents)):
+        term_frequency = Counter(document)
+        length_norm = k1 * (1 - b + b * len(document) / average_length)
+        score = 0.0
+        for term in query_terms.intersection(term_frequency):
+            frequency = document_frequency[term]
+            idf = math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+            score += idf * term_frequency[term] * (k1 + 1) / (term_frequency[term] + length_norm)
+        if score > min_score:
+            scored_jobs.append((score, index, job))
+
+    scored_jobs.sort(key=lambda item: (-item[0], item[1]))
+    return [job for _, _, job in scored_jobs[:top_n]]
+
+
+def _score_job(user_resume_text: str, job: Dict, max_job_chars: int, deadline: float) -> Optional[Dict]:
+    """
+    Score a single job against the resume with the LLM.
 
-    for job in limited_jobs:
-        job_description = _truncate_text(job.get("description", ""), max_job_chars)
-        # --- Build structured prompt ---
-        prompt = f"""
+    Returns the match entry when the score clears the threshold, otherwise None.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+
+    job_description = _truncate_text(job.get("description", ""), max_job_chars)
+    # --- Build structured prompt ---
+    prompt = f"""
 You are an AI job-matching assistant.
 
 Given a candidate's resume and a job description, analyze their match quality.
@@ -89,72 +366,166 @@ Example format:
 }}
         """
 
-        # --- Query the LLM ---
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-20b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            top_p=0.9,
-        )
+    # --- Query the LLM, with safe JSON parsing ---
+    result_json = complete_json(
+        prompt,
+        fallback=lambda content: {"score": 0, "keywords_matched": []},
+        timeout=remaining,
+        temperature=0.2,
+        top_p=0.9,
+    )
+
+    score = result_json.get("score", 0)
+    if score > 50:  # threshold
+        return {
+            "title": job.get("title"),
+            "link": job.get("link", "#") + "?resume_prefilled=true",
+            "score": score,
+            "keywords_matched": result_json.get("keywords_matched", [])
+        }
+    return None
+
+
+def _collect_result(future, description: str):
+    """Return a finished future's result, logging (not raising) task failures."""
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"Job matching task failed for {description}: {e}")
+        return None
 
-        content = response.choices[0].message.content.strip()
 
-        # --- Safe JSON parsing ---
-        try:
-            result_json = json.loads(content)
-        except json.JSONDecodeError:
-            result_json = {"score": 0, "keywords_matched": []}
-
-        score = result_json.get("score", 0)
-        if score > 50:  # threshold
-            matched_jobs.append({
-                "title": job.get("title"),
-                "link": job.get("link", "#") + "?resume_prefilled=true",
-                "score": score,
-                "keywords_matched": result_json.get("keywords_matched", [])
-            })
+def match_jobs_to_resume(
+    user_resume_text: str,
+    jobs: List[Dict],
+    top_k: int = 5,
+    max_jobs_per_call: int = 5,
+    max_job_chars: int = 2000,
+    deadline: Optional[float] = None,
+    prerank_top_n: Optional[int] = None,
+    prerank_text: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Match user's resume with job descriptions using Groq LLM semantic scoring.
+
+    Only the `prerank_top_n` (JOB_PRERANK_TOP_N by default) jobs ranked highest by
+    the local BM25 pre-ranker are sent to the LLM. The pre-ranker queries with
+    `prerank_text`, the untruncated resume context, or `user_resume_text` if unset.
+    The candidates are scored concurrently on the shared bounded pool. When `deadline`
+    (a time.monotonic() value, JOB_MATCH_DEADLINE from now by default) passes,
+    the matches scored so far are returned.
+
+    Returns a list of top-k matched jobs with JSON structure:
+    [
+        {
+            "title": "Software Engineer",
+            "link": "https://example.com/job1?resume_prefilled=true",
+            "score": 87,
+            "keywords_matched": ["Python", "REST APIs", "Django"]
+        },
+        ...
+    ]
+    """
+    if deadline is None:
+        deadline = time.monotonic() + settings.JOB_MATCH_DEADLINE
+
+    candidates = prerank_jobs(
+        prerank_text or user_resume_text,
+        jobs[:max_jobs_per_call],
+        top_n=prerank_top_n or settings.JOB_PRERANK_TOP_N,
+        min_score=settings.JOB_PRERANK_MIN_SCORE,
+    )
 
     # --- Sort and return top K ---
-    matched_jobs.sort(key=lambda x: x["score"], reverse=True)
-    return matched_jobs[:top_k]
+    return _score_jobs(user_resume_text, candidates, max_job_chars, deadline)[:top_k]
 
 
+def _score_jobs(user_resume_text: str, jobs: List[Dict], max_job_chars: int, deadline: float) -> List[Dict]:
+    """Score jobs concurrently on the shared pool and return the matches found by `deadline`, best first."""
+    futures = {
+        _executor.submit(_score_job, user_resume_text, job, max_job_chars, deadline): job.get("title")
+        for job in jobs
+    }
 
-def get_job_alerts_for_user(resume_text, user, max_jobs_per_source: int = 5):
-    """
-    Fetch limited jobs from each RSS source, match using LLM, and return top matches.
-    Limits are applied for fast response.
-    """
-    user_sources = user.job_sources.values("source__name", "source__rss_url")
+    done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        logger.warning(f"Job matching deadline reached with {len(not_done)} jobs unscored, returning partial results")
 
-    all_matches = []
-    resume_snippet = _truncate_text(resume_text)
-    top_matches_per_source = max(1, min(3, max_jobs_per_source))
-    for source in user_sources:
-        rss_url = source.get("source__rss_url")
-        source_name = source.get("source__name")
+    matched_jobs = [match for match in (_collect_result(future, futures[future]) for future in done) if match]
+    matched_jobs.sort(key=lambda x: x["score"], reverse=True)
+    return matched_jobs
 
-        if not rss_url:
-            continue
 
-        try:
-            print(f"Fetching top {max_jobs_per_source} jobs from {source_name}: {rss_url}")
-            jobs = fetch_jobs_from_rss(rss_url, limit=max_jobs_per_source)
-            if not jobs:
-                continue
-
-            matched_jobs = match_jobs_to_resume(
-                user_resume_text=resume_snippet,
-                jobs=jobs,
-                top_k=top_matches_per_source
-            )
-            all_matches.extend(matched_jobs)
-        except Exception as e:
-            print(f"Error fetching from {source_name}: {e}")
+def benchmark_prerank(resume_text: str, jobs: List[Dict], top_k: int = 5, prerank_top_n: Optional[int] = None,
+                      max_job_chars: int = 2000, deadline: float = 300.0) -> Dict:
+    """
+    Compare LLM-only job scoring with BM25 pre-ranking followed by LLM scoring.
+
+    Both paths score `jobs` against the same resume context. Returns the LLM calls
+    and wall time of each path, the time spent pre-ranking, and the recall of the
+    pre-ranked top `top_k` against the LLM-only top `top_k`.
+    """
+    llm_text = _truncate_text(resume_text)
+
+    started = time.monotonic()
+    llm_only = _score_jobs(llm_text, jobs, max_job_chars, started + deadline)[:top_k]
+    llm_only_seconds = time.monotonic() - started
+
+    started = time.monotonic()
+    candidates = prerank_jobs(resume_text, jobs, top_n=prerank_top_n or settings.JOB_PRERANK_TOP_N,
+                              min_score=settings.JOB_PRERANK_MIN_SCORE)
+    prerank_seconds = time.monotonic() - started
+    preranked = _score_jobs(llm_text, candidates, max_job_chars, started + deadline)[:top_k]
+    preranked_seconds = time.monotonic() - started
+
+    llm_only_links = {match["link"] for match in llm_only}
+    kept = llm_only_links.intersection(match["link"] for match in preranked)
+    return {
+        "jobs": len(jobs),
+        "llm_only_calls": len(jobs),
+        "llm_only_seconds": llm_only_seconds,
+        "preranked_calls": len(candidates),
+        "preranked_seconds": preranked_seconds,
+        "prerank_seconds": prerank_seconds,
+        "recall": len(kept) / len(llm_only_links) if llm_only_links else 1.0,
+    }
+
+
+def get_job_alerts_for_user(resume_text, user, max_jobs_per_source: int = 5, max_job_chars: int = 2000):
+    """
+    Match the latest stored postings from the user's active sources against the resume.
 
-    if not all_matches:
-        print("No jobs fetched from any active sources.")
+    Postings are read from the JobPosting store filled by the ingest_job_feeds worker,
+    so no feed is downloaded on the request path. Limits are applied for fast response.
+    """
+    source_ids = user.job_sources.filter(is_active=True, source__is_active=True).values_list("source_id", flat=True)
+
+    # Latest postings per source
+    postings = (
+        JobPosting.objects
+        .filter(source_id__in=source_ids, is_active=True)
+        .annotate(row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F("source_id")],
+            order_by=[F("published_at").desc(nulls_last=True), F("created").desc()],
+        ))
+        .filter(row_number__lte=max_jobs_per_source)
+        .values("title", "description", "link", "published")
+    )
+    jobs = list(postings)
+
+    if not jobs:
+        logger.info("No stored jobs for any of the user's active sources.")
         return []
 
-    all_matches.sort(key=lambda x: x["score"], reverse=True)
-    return all_matches[:5]
\ No newline at end of file
+    return match_jobs_to_resume(
+        user_resume_text=_truncate_text(resume_text),
+        jobs=jobs,
+        top_k=5,
+        max_jobs_per_call=len(jobs),
+        max_job_chars=max_job_chars,
+        # A truncated JSON profile no longer parses, so the pre-ranker gets the whole context
+        prerank_text=resume_text,
+    )
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from app.job_source.job_source_utils import JOB_MATCH_SECTIONS, benchmark_prerank
+from app.job_source.models import JobPosting
+from app.resume.resume_utils import get_resume_context
+
+
+class Command(BaseCommand):
+    help = ("Score the latest stored job postings against a user's resume with and without BM25 pre-ranking, "
+            "and report LLM calls, latency and the recall of the pre-ranked matches.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="User whose resume is matched.")
+        parser.add_argument("--jobs", type=int, default=25, help="Number of latest active postings to score.")
+        parser.add_argument("--top-k", type=int, default=5, help="Matches compared between the two paths.")
+        parser.add_argument("--prerank-top-n", type=int, default=settings.JOB_PRERANK_TOP_N,
+                            help="Candidates the pre-ranker sends to the LLM.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(email=options["email"].lower()).first()
+        if user is None or not user.resume_file:
+            raise CommandError(f"No user with a resume for {options['email']}")
+
+        jobs = list(
+            JobPosting.objects.filter(is_active=True)
+            .order_by("-created")
+            .values("title", "description", "link", "published")[:options["jobs"]]
+        )
+        if not jobs:
+            raise CommandError("No stored job postings; run ingest_job_feeds first.")
+
+        # The same context RecommendJobsAPIView matches with
+        resume_text = get_resume_context(user, JOB_MATCH_SECTIONS)
+        result = benchmark_prerank(resume_text, jobs, top_k=options["top_k"], prerank_top_n=options["prerank_top_n"])
+
+        self.stdout.write(f"Jobs scored:         {result['jobs']}")
+        self.stdout.write(f"LLM-only:            {result['llm_only_calls']} LLM calls, "
+                          f"{result['llm_only_seconds']:.2f}s")
+        self.stdout.write(f"BM25 + LLM:          {result['preranked_calls']} LLM calls, "
+                          f"{result['preranked_seconds']:.2f}s (pre-ranking {result['prerank_seconds'] * 1000:.1f}ms)")
+        self.stdout.write(self.style.SUCCESS(f"Recall@{options['top_k']} of BM25 + LLM: {result['recall']:.0%}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.job_source.job_source_utils import dedupe_user_sources
+
+
+class Command(BaseCommand):
+    help = "Keep one UserSource row per (user, source) pair. Run before migrating to the unique constraint."
+
+    def handle(self, *args, **options):
+        deleted = dedupe_user_sources()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} duplicate user sources."))
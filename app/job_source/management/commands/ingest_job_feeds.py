@@ -0,0 +1,38 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.job_source.job_source_utils import ingest_active_sources
+
+logger = logging.getLogger('django')
+
+
+class Command(BaseCommand):
+    help = "Fetch the RSS feeds of active sources that are due for a poll into the JobPosting store."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling the feeds until stopped.")
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=settings.JOB_FEED_WORKER_TICK,
+            help="Seconds to wait between checks for due sources when running with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                ingested = ingest_active_sources()
+                self.stdout.write(f"Ingested {ingested} job postings.")
+            except Exception as e:
+                if not options["loop"]:
+                    raise
+                logger.error(f"Job feed ingestion failed: {e}")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
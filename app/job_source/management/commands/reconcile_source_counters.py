@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.job_source.job_source_utils import refresh_source_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the subscriber and active alert counters of every source from UserSource."
+
+    def handle(self, *args, **options):
+        updated = refresh_source_counters()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters of {updated} sources."))
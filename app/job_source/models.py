@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 # Create your models here.
 class Source(models.Model):
@@ -10,11 +12,36 @@ class Source(models.Model):
     api_url = models.URLField(blank=True, null=True)
     rss_url = models.URLField(blank=True, null=True)
 
+    # Feed polling state
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_modified = models.CharField(max_length=100, blank=True, default="")
+    last_fetched = models.DateTimeField(blank=True, null=True)
+    last_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    last_entry_published = models.DateTimeField(blank=True, null=True)  # newest entry seen so far
+    poll_interval = models.PositiveIntegerField(blank=True, null=True)  # seconds, JOB_FEED_POLL_INTERVAL if unset
+    next_fetch_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    # Denormalized counters, see refresh_source_counters
+    subscriber_count = models.PositiveIntegerField(default=0)
+    active_alert_count = models.PositiveIntegerField(default=0)
+
     # Additional Fields
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Source list: active sources, most recently updated first (keyset on updated, pk)
+            models.Index(fields=["-updated", "-id"], condition=models.Q(is_active=True), name="source_active_updated"),
+            # Source popularity: active sources by subscriber count
+            models.Index(fields=["-subscriber_count"], condition=models.Q(is_active=True), name="source_active_popularity"),
+            # istartswith / icontains compile to UPPER(column) LIKE UPPER(pattern) on Postgres
+            models.Index(OpClass(Upper("name"), name="text_pattern_ops"), name="source_name_upper_prefix"),
+            GinIndex(OpClass(Upper("api_url"), name="gin_trgm_ops"), name="source_api_url_trgm"),
+            GinIndex(OpClass(Upper("rss_url"), name="gin_trgm_ops"), name="source_rss_url_trgm"),
+        ]
+
 
 class UserSource(models.Model):
 
@@ -44,4 +71,39 @@ class UserSource(models.Model):
     # Additional Fields
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
-    is_active = models.BooleanField(default=True)
\ No newline at end of file
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            # Also serves a user's subscriptions, as its leading column is user
+            models.UniqueConstraint(fields=["user", "source"], name="usersource_user_source_unique"),
+        ]
+
+
+class JobPosting(models.Model):
+
+    # Foreign key
+    source = models.ForeignKey(
+        Source,
+        on_delete=models.CASCADE,
+        related_name="job_postings",  # all postings ingested from this source
+        related_query_name="job_posting"
+    )
+
+    # Field declarations
+    link = models.URLField(max_length=2000)
+    link_hash = models.CharField(max_length=64, unique=True)
+    title = models.CharField(max_length=500)
+    description = models.TextField(blank=True)
+    published = models.CharField(max_length=100, blank=True)
+    published_at = models.DateTimeField(blank=True, null=True)
+
+    # Additional Fields
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["source", "-published_at"], name="jobposting_source_published"),
+        ]
@@ -20,6 +20,16 @@ class SourceUpdateSerializer(serializers.ModelSerializer):
         model = Source
         fields = ( 'name', 'api_url', 'rss_url',)
 
+    def update(self, instance, validated_data):
+        if 'rss_url' in validated_data and validated_data['rss_url'] != instance.rss_url:
+            # Polling state belongs to the old feed
+            instance.etag = ""
+            instance.last_modified = ""
+            instance.last_entry_published = None
+            instance.poll_interval = None
+            instance.next_fetch_at = None
+        return super().update(instance, validated_data)
+
 
 class SourceListFilterDisplaySerializer(serializers.ModelSerializer):
     class Meta:
@@ -32,10 +42,27 @@ class SourceListSerializer(serializers.ModelSerializer):
         model = Source
         fields = ('pk', 'name',)
 
-class UserSourceSelectSerializer(serializers.ModelSerializer):
+class UserSourceItemListSerializer(serializers.ListSerializer):
+
+    def validate(self, attrs):
+        # One query for all selected sources instead of one lookup per item
+        source_ids = {item['source'] for item in attrs}
+        existing_ids = set(Source.objects.filter(pk__in=source_ids).values_list('pk', flat=True))
+        missing_ids = sorted(source_ids - existing_ids)
+        if missing_ids:
+            raise serializers.ValidationError(f"Invalid source ids: {missing_ids}")
+        return attrs
+
+
+class UserSourceItemSerializer(serializers.Serializer):
+    """ Serializer: One source selection of a user, validated without per-item queries """
+
+    source = serializers.IntegerField()
+    frequency = serializers.ChoiceField(choices=UserSource._meta.get_field('frequency').choices, default='once')
+    alert = serializers.BooleanField(default=True)
+
     class Meta:
-        model = UserSource
-        fields = ('pk', 'user', 'source', 'frequency', 'alert')
+        list_serializer_class = UserSourceItemListSerializer
 
 
 class UserSourceSelectDisplaySerializer(serializers.ModelSerializer):
@@ -0,0 +1,11 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import connections
+
+
+def create_trigram_extension(sender, using, **kwargs):
+    """pre_migrate: the Source URL indexes use gin_trgm_ops, which needs pg_trgm."""
+    if connections[using].vendor != "postgresql":
+        return
+    with connections[using].schema_editor() as schema_editor:
+        # No-op when the extension exists or the router keeps job_source off this database
+        TrigramExtension().database_forwards(sender.label, schema_editor, None, None)
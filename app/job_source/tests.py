@@ -1,3 +1,441 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+import feedparser
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from app.core.tests import IndexPlanTestCase
+from app.global_constants import RoleConstants
+from app.job_source.job_source_utils import JOB_MATCH_SECTIONS, _score_jobs, dedupe_user_sources, \
+    get_job_alerts_for_user, ingest_source, prerank_jobs, refresh_source_counters, sync_user_sources
+from app.job_source.models import JobPosting, Source, UserSource
+from app.job_source.views import SourceListFilter
+from app.resume.resume_utils import format_resume_sections
+from app.role.models import Role
+from app.user.authentication import ClaimsRefreshToken
+
+
+class SourceIndexPlanTests(IndexPlanTestCase):
+    """SourceListFilter pages are answered from the Source indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Source.objects.bulk_create(
+            Source(name=f"Source {index}", api_url=f"https://api{index}.example.com/jobs",
+                   rss_url=f"https://feeds{index}.example.com/rss", is_active=index % 10 != 0)
+            for index in range(5000)
+        )
+        cls.analyze(Source)
+
+    def test_active_source_list_uses_partial_index(self):
+        self.assertUsesIndex(self.explain_page(SourceListFilter), "source_active_updated")
+
+    def test_name_prefix_search_uses_pattern_index(self):
+        self.assertUsesIndex(self.explain_page(SourceListFilter, name="source 4999"), "source_name_upper_prefix")
+
+    def test_url_search_uses_trigram_indexes(self):
+        self.assertUsesIndex(self.explain_page(SourceListFilter, api_url="api4999."), "source_api_url_trgm")
+        self.assertUsesIndex(self.explain_page(SourceListFilter, rss_url="feeds4999."), "source_rss_url_trgm")
+
+
+class SyncUserSourcesTests(TestCase):
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user("sources@example.com", "password", role=role)
+        self.sources = [Source.objects.create(name=f"Source {index}") for index in range(8)]
+        for source in self.sources[:6]:
+            UserSource.objects.create(user=self.user, source=source, frequency="daily", alert=True)
+        UserSource.objects.filter(source=self.sources[5]).update(is_active=False)
+
+    def selections(self):
+        return {
+            user_source.source_id: (user_source.frequency, user_source.alert, user_source.is_active)
+            for user_source in UserSource.objects.filter(user=self.user)
+        }
+
+    def test_inserts_updates_and_deactivates_in_constant_queries(self):
+        items = [
+            {"source": self.sources[0].pk, "frequency": "daily", "alert": True},  # unchanged
+            {"source": self.sources[1].pk, "frequency": "weekly", "alert": True},  # updated
+            {"source": self.sources[2].pk, "frequency": "daily", "alert": False},  # updated
+            {"source": self.sources[5].pk, "frequency": "daily", "alert": True},  # re-activated
+            {"source": self.sources[6].pk, "frequency": "once", "alert": True},  # inserted
+            {"source": self.sources[7].pk, "frequency": "monthly", "alert": False},  # inserted
+        ]
+
+        # One read of the current rows, one upsert and one bulk update, however many rows change
+        with self.assertNumQueries(3):
+            changed = sync_user_sources(self.user, items, deactivate_missing=True)
+
+        ids = [source.pk for source in self.sources]
+        self.assertEqual(changed, set(ids[1:]))
+        self.assertEqual(self.selections(), {
+            ids[0]: ("daily", True, True),
+            ids[1]: ("weekly", True, True),
+            ids[2]: ("daily", False, True),
+            ids[3]: ("daily", True, False),
+            ids[4]: ("daily", True, False),
+            ids[5]: ("daily", True, True),
+            ids[6]: ("once", True, True),
+            ids[7]: ("monthly", False, True),
+        })
+
+    def test_unchanged_selection_writes_nothing(self):
+        items = [{"source": source.pk, "frequency": "daily", "alert": True} for source in self.sources[:5]]
+        with self.assertNumQueries(1):
+            changed = sync_user_sources(self.user, items, deactivate_missing=True)
+        self.assertEqual(changed, set())
+
+    def test_missing_rows_are_kept_without_deactivate_missing(self):
+        items = [{"source": self.sources[6].pk, "frequency": "once", "alert": True}]
+        with self.assertNumQueries(2):
+            sync_user_sources(self.user, items)
+        self.assertEqual(UserSource.objects.filter(user=self.user, is_active=True).count(), 6)
+
+    def test_dedupe_keeps_distinct_pairs(self):
+        # Duplicates cannot be inserted once the unique constraint exists; distinct pairs must survive
+        self.assertEqual(dedupe_user_sources(), 0)
+        self.assertEqual(UserSource.objects.filter(user=self.user).count(), 6)
+
+
+
+
+class SourceCounterTests(TestCase):
+    """Source.subscriber_count / active_alert_count follow every subscription change."""
+
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.users = [
+            get_user_model().objects.create_user(f"counter{index}@example.com", "password", role=role)
+            for index in range(2)
+        ]
+        self.sources = [Source.objects.create(name=f"Source {index}") for index in range(3)]
+
+    def counters(self):
+        return {
+            source.pk: (source.subscriber_count, source.active_alert_count)
+            for source in Source.objects.filter(pk__in=[source.pk for source in self.sources])
+        }
+
+    def post(self, user, path, selections):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(user).access_token}")
+        items = [{"source": source.pk, "frequency": "daily", "alert": alert} for source, alert in selections]
+        self.assertEqual(client.post(f"/api/job-source/{path}", items, format="json").status_code, 201)
+
+    def test_counters_follow_subscribe_toggle_and_unsubscribe(self):
+        first, second, third = (source.pk for source in self.sources)
+
+        self.post(self.users[0], "select", [(self.sources[0], True), (self.sources[1], False)])
+        self.post(self.users[1], "select", [(self.sources[0], True)])
+        self.assertEqual(self.counters(), {first: (2, 2), second: (1, 0), third: (0, 0)})
+
+        # Alert toggles change only the alert counter
+        self.post(self.users[0], "update-selection", [(self.sources[0], False), (self.sources[1], True)])
+        self.assertEqual(self.counters(), {first: (2, 1), second: (1, 1), third: (0, 0)})
+
+        # Leaving a source out of the new selection unsubscribes from it
+        self.post(self.users[1], "update-selection", [(self.sources[2], True)])
+        self.assertEqual(self.counters(), {first: (1, 0), second: (1, 1), third: (1, 1)})
+
+        # Selecting a source again re-activates the same row
+        self.post(self.users[1], "select", [(self.sources[0], True)])
+        self.assertEqual(self.counters(), {first: (2, 1), second: (1, 1), third: (1, 1)})
+        self.assertEqual(UserSource.objects.count(), 4)
+
+    def test_sync_then_refresh_of_the_changed_sources(self):
+        items = [{"source": source.pk, "frequency": "daily", "alert": True} for source in self.sources[:2]]
+        changed = sync_user_sources(self.users[0], items)
+
+        self.assertEqual(refresh_source_counters(changed), 2)
+        self.assertEqual(self.counters(), {
+            self.sources[0].pk: (1, 1), self.sources[1].pk: (1, 1), self.sources[2].pk: (0, 0),
+        })
+
+    def test_refresh_repairs_drift(self):
+        UserSource.objects.create(user=self.users[0], source=self.sources[0], alert=False)
+        UserSource.objects.create(user=self.users[1], source=self.sources[0], alert=True, is_active=False)
+        Source.objects.update(subscriber_count=7, active_alert_count=7)
+
+        # Only the given sources are recomputed
+        refresh_source_counters([self.sources[0].pk])
+        self.assertEqual(self.counters()[self.sources[0].pk], (1, 0))
+        self.assertEqual(self.counters()[self.sources[1].pk], (7, 7))
+
+        self.assertEqual(refresh_source_counters(), 3)
+        self.assertEqual(self.counters(), {
+            self.sources[0].pk: (1, 0), self.sources[1].pk: (0, 0), self.sources[2].pk: (0, 0),
+        })
+
+@mock.patch("app.job_source.job_source_utils.match_jobs_to_resume", return_value=[])
+class JobAlertPostingsTests(TestCase):
+    """get_job_alerts_for_user reads the latest stored postings of each subscribed source."""
+
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user("alerts@example.com", "password", role=role)
+        self.now = datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+
+        self.busy, self.quiet, self.unsubscribed, self.disabled = (
+            Source.objects.create(name=name) for name in ("Busy", "Quiet", "Unsubscribed", "Disabled")
+        )
+        Source.objects.filter(pk=self.disabled.pk).update(is_active=False)
+        for source in (self.busy, self.quiet, self.unsubscribed, self.disabled):
+            UserSource.objects.create(user=self.user, source=source)
+        UserSource.objects.filter(source=self.unsubscribed).update(is_active=False)
+
+        # Busy: more postings than the cap, one undated and one withdrawn
+        for days_old in (5, 1, 4, None, 2, 3):
+            self._posting(self.busy, days_old)
+        self._posting(self.busy, 0, is_active=False)
+        self._posting(self.quiet, 10)
+        self._posting(self.unsubscribed, 0)
+        self._posting(self.disabled, 0)
+
+    def _posting(self, source, days_old, is_active=True):
+        published_at = None if days_old is None else self.now - timedelta(days=days_old)
+        name = f"{source.name} {'undated' if days_old is None else days_old}{'' if is_active else ' withdrawn'}"
+        return JobPosting.objects.create(
+            source=source, title=name, description=name, link=f"https://example.com/{name.replace(' ', '-')}",
+            link_hash=name, published=published_at.isoformat() if published_at else "",
+            published_at=published_at, is_active=is_active,
+        )
+
+    def test_latest_active_postings_are_capped_per_source(self, match_jobs_to_resume):
+        get_job_alerts_for_user("resume", self.user, max_jobs_per_source=3)
+
+        jobs = match_jobs_to_resume.call_args.kwargs["jobs"]
+        self.assertCountEqual([job["title"] for job in jobs], ["Busy 1", "Busy 2", "Busy 3", "Quiet 10"])
+        self.assertEqual(match_jobs_to_resume.call_args.kwargs["max_jobs_per_call"], 4)
+        busy_1 = next(job for job in jobs if job["title"] == "Busy 1")
+        self.assertEqual(busy_1, {
+            "title": "Busy 1", "description": "Busy 1", "link": "https://example.com/Busy-1",
+            "published": (self.now - timedelta(days=1)).isoformat(),
+        })
+
+    def test_undated_postings_come_after_dated_ones(self, match_jobs_to_resume):
+        def busy_titles(max_jobs_per_source):
+            get_job_alerts_for_user("resume", self.user, max_jobs_per_source=max_jobs_per_source)
+            jobs = match_jobs_to_resume.call_args.kwargs["jobs"]
+            return [job["title"] for job in jobs if job["title"].startswith("Busy")]
+
+        self.assertCountEqual(busy_titles(6), ["Busy 1", "Busy 2", "Busy 3", "Busy 4", "Busy 5", "Busy undated"])
+        self.assertNotIn("Busy undated", busy_titles(5))
+
+    def test_no_postings_skips_matching(self, match_jobs_to_resume):
+        JobPosting.objects.all().delete()
+
+        self.assertEqual(get_job_alerts_for_user("resume", self.user), [])
+        match_jobs_to_resume.assert_not_called()
+
+def _feed(status, entries=(), **headers):
+    return feedparser.FeedParserDict(status=status, entries=[feedparser.FeedParserDict(entry) for entry in entries],
+                                     **headers)
+
+
+def _entry(link, published=None):
+    entry = {"title": f"Job at {link}", "link": link, "summary": ""}
+    if published:
+        entry["published_parsed"] = time.strptime(published, "%Y-%m-%d")
+    return entry
+
+
+@override_settings(JOB_FEED_POLL_INTERVAL=900, JOB_FEED_MIN_POLL_INTERVAL=300, JOB_FEED_MAX_POLL_INTERVAL=3600)
+@mock.patch("app.job_source.job_source_utils.feedparser.parse")
+class IngestSourceTests(TestCase):
+    def setUp(self):
+        self.source = Source.objects.create(name="Feed", rss_url="https://example.com/feed", poll_interval=600)
+
+    def test_200_stores_postings_validators_and_watermark(self, parse):
+        parse.return_value = _feed(
+            200,
+            [_entry("https://example.com/1", "2025-01-01"), _entry("https://example.com/2", "2025-01-03")],
+            etag='"v1"', modified="Fri, 03 Jan 2025 00:00:00 GMT",
+        )
+        self.assertEqual(ingest_source(self.source), 2)
+
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.etag, '"v1"')
+        self.assertEqual(self.source.last_modified, "Fri, 03 Jan 2025 00:00:00 GMT")
+        self.assertEqual(self.source.last_entry_published, datetime(2025, 1, 3, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.source.poll_interval, 300)
+        self.assertEqual(JobPosting.objects.filter(source=self.source).count(), 2)
+
+    def test_304_sends_and_keeps_validators(self, parse):
+        Source.objects.filter(pk=self.source.pk).update(etag='"v1"', last_modified="Fri, 03 Jan 2025 00:00:00 GMT")
+        self.source.refresh_from_db()
+        parse.return_value = _feed(304)
+
+        self.assertEqual(ingest_source(self.source), 0)
+
+        parse.assert_called_once_with(self.source.rss_url, etag='"v1"', modified="Fri, 03 Jan 2025 00:00:00 GMT")
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.etag, '"v1"')
+        self.assertEqual(self.source.last_modified, "Fri, 03 Jan 2025 00:00:00 GMT")
+        self.assertEqual(self.source.last_status, 304)
+        self.assertEqual(self.source.poll_interval, 900)
+
+    def test_failed_fetch_keeps_validators(self, parse):
+        Source.objects.filter(pk=self.source.pk).update(etag='"v1"')
+        self.source.refresh_from_db()
+        parse.return_value = _feed(None)
+
+        ingest_source(self.source)
+
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.etag, '"v1"')
+
+    def test_entries_older_than_watermark_are_skipped(self, parse):
+        Source.objects.filter(pk=self.source.pk).update(
+            last_entry_published=datetime(2025, 1, 2, tzinfo=dt_timezone.utc)
+        )
+        self.source.refresh_from_db()
+        parse.return_value = _feed(
+            200, [_entry("https://example.com/old", "2025-01-01"), _entry("https://example.com/new", "2025-01-03")]
+        )
+
+        self.assertEqual(ingest_source(self.source), 1)
+        self.assertEqual(list(JobPosting.objects.values_list("link", flat=True)), ["https://example.com/new"])
+
+    def test_known_undated_entries_do_not_count_as_changed(self, parse):
+        parse.return_value = _feed(200, [_entry("https://example.com/undated")])
+        ingest_source(self.source)
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.poll_interval, 300)
+
+        ingest_source(self.source)
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.poll_interval, 450)
+
+
+class PrerankJobsTests(SimpleTestCase):
+    # RecommendJobsAPIView passes get_resume_context(user, JOB_MATCH_SECTIONS): the profile as compact JSON
+    resume_text = format_resume_sections({
+        "contact": {"name": "Jane Doe"},
+        "skills": ["Python", "Django", "PostgreSQL", "AWS", "Docker", "Celery"],
+        "experience": [
+            {"role": "Backend Engineer", "company": "TechCorp", "duration": "2020-2025",
+             "highlights": ["Built REST APIs serving 1M requests/day", "Deployed services on AWS"]},
+        ],
+    }, JOB_MATCH_SECTIONS)
+
+    relevant_jobs = [
+        {"title": "Senior Python Developer", "description": "Build Django REST APIs backed by PostgreSQL."},
+        {"title": "Backend Engineer", "description": "<p>Python services, Celery workers, Docker on AWS.</p>"},
+        {"title": "Platform Engineer", "description": "Own our AWS infrastructure and Docker based deployments."},
+    ]
+    irrelevant_jobs = [
+        {"title": "Registered Nurse", "description": "Provide patient care in a busy hospital ward."},
+        {"title": "Sales Associate", "description": "Greet customers and manage the store floor."},
+        {"title": "Graphic Designer", "description": "Create brand illustrations in Figma and Photoshop."},
+        {"title": "Accountant", "description": "Prepare monthly ledgers and tax filings."},
+    ]
+    # Unrelated postings made of the profile's JSON keys
+    key_only_jobs = [
+        {"title": "Retail Store Role", "description": "Experience in retail and people skills; join our company."},
+        {"title": "Event Host", "description": "A role for a host with experience and highlights of past events."},
+    ]
+
+    def test_keeps_every_relevant_job_the_llm_would_have_seen(self):
+        # Without the prefilter the LLM scores every job; the prefilter must not lose the relevant ones
+        jobs = self.irrelevant_jobs[:2] + self.relevant_jobs + self.irrelevant_jobs[2:]
+        candidates = prerank_jobs(self.resume_text, jobs, top_n=len(self.relevant_jobs))
+        self.assertCountEqual([job["title"] for job in candidates], [job["title"] for job in self.relevant_jobs])
+
+    def test_drops_jobs_sharing_no_term_with_the_resume(self):
+        candidates = prerank_jobs(self.resume_text, self.relevant_jobs + self.irrelevant_jobs, top_n=10)
+        self.assertEqual(len(candidates), len(self.relevant_jobs))
+
+    def test_profile_keys_are_not_query_terms(self):
+        candidates = prerank_jobs(self.resume_text, self.key_only_jobs + self.relevant_jobs, top_n=10)
+        self.assertCountEqual([job["title"] for job in candidates], [job["title"] for job in self.relevant_jobs])
+
+    def test_closer_matches_rank_first(self):
+        candidates = prerank_jobs(self.resume_text, self.relevant_jobs[::-1], top_n=2)
+        self.assertCountEqual([job["title"] for job in candidates], ["Senior Python Developer", "Backend Engineer"])
+
+    def test_raw_text_context_is_used_as_is(self):
+        # get_resume_context falls back to the extracted text when no profile could be parsed
+        resume_text = "Backend engineer building REST APIs with Python and Django."
+        candidates = prerank_jobs(resume_text, self.irrelevant_jobs + self.relevant_jobs, top_n=10)
+        self.assertEqual([job["title"] for job in candidates][:1], ["Senior Python Developer"])
+        self.assertNotIn("Accountant", [job["title"] for job in candidates])
+
+    def test_without_resume_terms_keeps_feed_order(self):
+        self.assertEqual(prerank_jobs("", self.irrelevant_jobs, top_n=2), self.irrelevant_jobs[:2])
+
+
+class ScoreJobsTests(SimpleTestCase):
+    """LLM scoring fans out on the shared pool and stops at the deadline."""
+
+    def setUp(self):
+        # Released on cleanup so no pool thread outlives the test
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.scores = {}
+        self.prompts = []
+        patcher = mock.patch("app.job_source.job_source_utils.complete_json", side_effect=self._complete_json)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _complete_json(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        job = next(description for description in self.scores if description in prompt)
+        score = self.scores[job]
+        if callable(score):
+            score = score()
+        return {"score": score, "keywords_matched": [job]}
+
+    def _jobs(self, **scores):
+        self.scores = scores
+        return [{"title": name, "description": name, "link": f"https://example.com/{name}"} for name in scores]
+
+    def _slow(self, score):
+        def wait():
+            self.release.wait(5)
+            return score
+        return wait
+
+    def test_jobs_are_scored_concurrently(self):
+        # Each call waits for all four, which only happens if they run at the same time
+        barrier = threading.Barrier(4, timeout=5)
+
+        def together():
+            barrier.wait()
+            return 80
+
+        jobs = self._jobs(**{f"job{index}": together for index in range(4)})
+
+        matches = _score_jobs("resume", jobs, 2000, time.monotonic() + 5)
+
+        self.assertEqual(len(matches), 4)
+
+    def test_partial_results_are_returned_at_the_deadline(self):
+        jobs = self._jobs(fast=90, slower=70, stuck=self._slow(99), weak=40)
+
+        started = time.monotonic()
+        matches = _score_jobs("resume", jobs, 2000, started + 0.5)
+
+        self.assertLess(time.monotonic() - started, 1.5)
+        # The stuck job is dropped, the weak one is under the threshold, the rest come best first
+        self.assertEqual([match["title"] for match in matches], ["fast", "slower"])
+        self.assertEqual(matches[0]["link"], "https://example.com/fast?resume_prefilled=true")
+
+    def test_failed_job_is_skipped(self):
+        def fail():
+            raise RuntimeError("LLM unavailable")
+
+        matches = _score_jobs("resume", self._jobs(good=80, broken=fail), 2000, time.monotonic() + 5)
+
+        self.assertEqual([match["title"] for match in matches], ["good"])
+
+    def test_jobs_are_not_sent_once_the_deadline_passed(self):
+        matches = _score_jobs("resume", self._jobs(late=90), 2000, time.monotonic() - 1)
+
+        self.assertEqual(matches, [])
+        self.assertEqual(self.prompts, [])
@@ -4,18 +4,19 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView, ListAPIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from app.analytics.analytics_utils import save_ai_analytics
+from app.analytics.analytics_utils import credit_required, invalidate_dashboard_summary, save_ai_analytics
 from app.analytics.models import AIAnalytics
-from app.core.views import CustomPageNumberPagination
+from app.core.views import KeysetPagination
 from app.global_constants import ErrorMessage, SuccessMessage
-from app.job_source.job_source_utils import get_job_alerts_for_user
-from app.job_source.models import Source, UserSource
+from app.job_source.job_source_utils import get_job_alerts_for_user, refresh_source_counters, sync_user_sources, \
+    JOB_MATCH_SECTIONS
+from app.job_source.models import Source
 from app.job_source.serializers import SourceCreateSerializer, SourceDisplaySerializer, SourceUpdateSerializer, \
-    SourceListFilterDisplaySerializer, SourceListSerializer, UserSourceSelectSerializer, \
+    SourceListFilterDisplaySerializer, SourceListSerializer, UserSourceItemSerializer, \
     UserSourceSelectDisplaySerializer
-from app.portfolio.portfolio_utils import extract_resume_text, get_file_type
+from app.portfolio.portfolio_utils import get_file_type
+from app.resume.resume_utils import get_resume_context
 from app.utils import get_response_schema
 from permissions import IsSuperAdmin, IsUser
 
@@ -112,9 +113,9 @@ class SourceListFilter(ListAPIView):
     """Source: List-filter"""
 
     serializer_class = SourceListFilterDisplaySerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-updated", "-pk")
 
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsSuperAdmin]
 
     def get_queryset(self):
@@ -187,16 +188,16 @@ class SourceSelectAPIView(GenericAPIView):
     )
     def post(self, request):
 
+        serializer = UserSourceItemSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
+
         with transaction.atomic():
-            for source in request.data:
-                source["user"] = request.user.id
-                serializer = UserSourceSelectSerializer(data=source)
-                if serializer.is_valid():
-                    serializer.save()
-                else:
-                    transaction.set_rollback(True)
-                    return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value,
-                                               status.HTTP_400_BAD_REQUEST)
+            changed_source_ids = sync_user_sources(request.user, serializer.validated_data)
+            refresh_source_counters(changed_source_ids)
+
+            # Bulk writes send no model signals
+            transaction.on_commit(invalidate_dashboard_summary)
 
         return get_response_schema({}, SuccessMessage.RECORD_CREATED.value, status.HTTP_201_CREATED)
 
@@ -238,20 +239,17 @@ class UserSourceUpdateAPIView(GenericAPIView):
     )
     def post(self, request):
 
-        with transaction.atomic():
+        serializer = UserSourceItemSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
 
-            # delete existing user source
-            UserSource.objects.filter(user_id=request.user.id).delete()
+        with transaction.atomic():
+            # Sources left out of the new selection are deactivated
+            changed_source_ids = sync_user_sources(request.user, serializer.validated_data, deactivate_missing=True)
+            refresh_source_counters(changed_source_ids)
 
-            for source in request.data:
-                source["user"] = request.user.id
-                serializer = UserSourceSelectSerializer(data=source)
-                if serializer.is_valid():
-                    serializer.save()
-                else:
-                    transaction.set_rollback(True)
-                    return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value,
-                                               status.HTTP_400_BAD_REQUEST)
+            # Bulk writes send no model signals
+            transaction.on_commit(invalidate_dashboard_summary)
 
         return get_response_schema({}, SuccessMessage.RECORD_CREATED.value, status.HTTP_201_CREATED)
 
@@ -260,6 +258,7 @@ class RecommendJobsAPIView(GenericAPIView):
     """Get Job Alerts"""
     permission_classes = [IsUser]
 
+    @credit_required
     def post(self, request):
         # Check if the user has resume file
         if not request.user.resume_file:
@@ -270,7 +269,7 @@ class RecommendJobsAPIView(GenericAPIView):
             )
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -278,7 +277,7 @@ class RecommendJobsAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, JOB_MATCH_SECTIONS)
 
         job_alerts = get_job_alerts_for_user(resume_text, request.user)
 
@@ -0,0 +1,229 @@
+import functools
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import httpx
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from groq import Groq, APIConnectionError, APIStatusError
+
+from app.llm.models import LLMResponseCache
+
+logger = logging.getLogger('django')
+
+DEFAULT_MODEL = "openai/gpt-oss-20b"
+
+# Transient HTTP statuses worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# One pooled client per worker process, created on first use
+_client = None
+_client_lock = threading.Lock()
+
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when a completion cannot be produced before its deadline."""
+
+
+def get_client() -> Groq:
+    """Return the shared Groq client, keeping connections (and TLS sessions) alive between calls."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+            )
+            # Retries are handled by complete() so they respect the per-call deadline
+            _client = Groq(api_key=settings.GROQ_API_KEY, http_client=http_client, max_retries=0)
+        return _client
+
+
+def _parse_retry_after(error) -> Optional[float]:
+    """Read the server-requested delay, in seconds, from a Retry-After header."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(retry_after) - timezone.now()).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(attempt: int, error) -> float:
+    """Honour Retry-After when present, otherwise back off exponentially with jitter."""
+    retry_after = _parse_retry_after(error)
+    if retry_after is not None:
+        return retry_after
+    backoff = min(settings.LLM_RETRY_MAX_BACKOFF, settings.LLM_RETRY_BACKOFF * (2 ** attempt))
+    return random.uniform(backoff / 2, backoff)
+
+
+def complete(prompt: str, model: str = DEFAULT_MODEL, timeout: Optional[float] = None, **params) -> str:
+    """
+    Run a single-prompt chat completion and return the stripped response text.
+
+    Args:
+        prompt: User prompt sent to the model.
+        model: Model name.
+        timeout: Overall deadline in seconds covering every attempt (defaults to LLM_TIMEOUT).
+        **params: Sampling parameters such as temperature, top_p or max_tokens; None values are dropped.
+
+    Transient failures (connection errors, timeouts, 429 and 5xx) are retried with
+    backoff until LLM_MAX_RETRIES or the deadline is reached.
+    """
+    deadline = time.monotonic() + (timeout or settings.LLM_TIMEOUT)
+    params = {key: value for key, value in params.items() if value is not None}
+
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded(f"LLM call to {model} exceeded its deadline after {attempt} retries")
+
+        try:
+            response = get_client().chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=remaining,
+                **params,
+            )
+            return (response.choices[0].message.content or "").strip()
+        except (APIConnectionError, APIStatusError) as e:
+            if isinstance(e, APIStatusError) and e.status_code not in RETRYABLE_STATUS_CODES:
+                raise
+            if attempt >= settings.LLM_MAX_RETRIES:
+                raise
+
+            delay = _retry_delay(attempt, e)
+            if time.monotonic() + delay >= deadline:
+                raise
+            logger.warning(f"LLM call to {model} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def complete_json(prompt: str, fallback: Optional[Callable] = None, **kwargs):
+    """
+    Run complete() and parse the response as JSON.
+
+    If the response is not valid JSON, `fallback(content)` is returned when given,
+    otherwise {"raw_text": content}.
+    """
+    content = complete(prompt, **kwargs)
+
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        if fallback is not None:
+            return fallback(content)
+        return {"raw_text": content}
+
+
+def make_cache_key(function_name: str, version: int, model: str, *args, **kwargs) -> str:
+    """
+    Build the response-cache key for a generation call.
+
+    String inputs (resume, job description) are reduced to their SHA-256 so the
+    key covers (function, model, prompt-template version, input hashes, params).
+    """
+    def _fingerprint(value):
+        if isinstance(value, str):
+            return hashlib.sha256(value.encode("utf-8")).hexdigest()
+        return value
+
+    key_data = {
+        "function": function_name,
+        "version": version,
+        "model": model,
+        "args": [_fingerprint(arg) for arg in args],
+        "kwargs": {name: _fingerprint(value) for name, value in sorted(kwargs.items())},
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def get_cached_response(key: str):
+    """Return an unexpired cached response and mark it as recently used, or None."""
+    now = timezone.now()
+    entry = LLMResponseCache.objects.filter(key=key, expires_at__gt=now).only("pk", "response").first()
+    if entry is None:
+        return None
+
+    LLMResponseCache.objects.filter(pk=entry.pk).update(last_accessed=now, hits=F("hits") + 1)
+    return entry.response
+
+
+def set_cached_response(key: str, function_name: str, model: str, response):
+    """Store a response, then drop expired entries and evict the least recently used beyond the size cap."""
+    now = timezone.now()
+    LLMResponseCache.objects.update_or_create(
+        key=key,
+        defaults={
+            "function": function_name,
+            "model": model,
+            "response": response,
+            "expires_at": now + timedelta(seconds=settings.LLM_CACHE_TTL),
+            "last_accessed": now,
+        },
+    )
+
+    LLMResponseCache.objects.filter(expires_at__lte=now).delete()
+    overflow_ids = list(
+        LLMResponseCache.objects.order_by("-last_accessed").values_list("pk", flat=True)[settings.LLM_CACHE_MAX_ENTRIES:]
+    )
+    if overflow_ids:
+        LLMResponseCache.objects.filter(pk__in=overflow_ids).delete()
+
+
+def cached_response(version: int, model: str = DEFAULT_MODEL):
+    """
+    Decorator: cache the JSON result of a generation function that is deterministic in its inputs.
+
+    Bump `version` whenever the prompt template changes so stale responses are not served.
+    Fallback results that could not be parsed ({"raw_text": ...}) are never cached.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.LLM_CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            key = make_cache_key(func.__name__, version, model, *args, **kwargs)
+            cached = get_cached_response(key)
+            if cached is not None:
+                return cached
+
+            result = func(*args, **kwargs)
+            if not (isinstance(result, dict) and "raw_text" in result):
+                set_cached_response(key, func.__name__, model, result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+# Create your models here.
+class LLMResponseCache(models.Model):
+    """ Model: Cached LLM response, keyed by a hash of the generation inputs """
+
+    # Field declarations
+    key = models.CharField(max_length=64, unique=True)
+    function = models.CharField(max_length=100)
+    model = models.CharField(max_length=100)
+    response = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+    last_accessed = models.DateTimeField(db_index=True)
+
+    # Additional Field declarations
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase, TestCase, override_settings
+from groq import APIConnectionError, APIStatusError
+
+from app.llm.llm_utils import LLMDeadlineExceeded, cached_response, complete
+from app.llm.models import LLMResponseCache
+
+REQUEST = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+
+def _status_error(status_code, **headers):
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    return APIStatusError(f"HTTP {status_code}", response=response, body=None)
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances the monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@override_settings(LLM_TIMEOUT=60, LLM_MAX_RETRIES=3, LLM_RETRY_BACKOFF=1, LLM_RETRY_MAX_BACKOFF=20)
+class CompleteRetryTests(SimpleTestCase):
+    def setUp(self):
+        self.create = mock.Mock()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+        self.clock = FakeClock()
+        for target, value in (("get_client", mock.Mock(return_value=client)), ("time", self.clock)):
+            patcher = mock.patch(f"app.llm.llm_utils.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_429_waits_for_retry_after(self):
+        self.create.side_effect = [_status_error(429, **{"retry-after": "7"}), _completion(" done ")]
+
+        self.assertEqual(complete("prompt"), "done")
+        self.assertEqual(self.clock.sleeps, [7.0])
+
+    def test_retry_after_ms_takes_precedence(self):
+        self.create.side_effect = [_status_error(429, **{"retry-after-ms": "250", "retry-after": "7"}),
+                                   _completion("done")]
+
+        complete("prompt")
+        self.assertEqual(self.clock.sleeps, [0.25])
+
+    def test_5xx_is_retried_with_backoff(self):
+        self.create.side_effect = [_status_error(503), APIConnectionError(request=REQUEST), _completion("done")]
+
+        self.assertEqual(complete("prompt"), "done")
+        self.assertEqual(self.create.call_count, 3)
+        # Exponential backoff with jitter: attempt n waits between half and all of 2**n seconds
+        self.assertTrue(0.5 <= self.clock.sleeps[0] <= 1)
+        self.assertTrue(1 <= self.clock.sleeps[1] <= 2)
+
+    def test_each_attempt_gets_the_remaining_time(self):
+        self.create.side_effect = [_status_error(429, **{"retry-after": "10"}), _completion("done")]
+
+        complete("prompt", timeout=30)
+        self.assertEqual([call.kwargs["timeout"] for call in self.create.call_args_list], [30, 20])
+
+    def test_non_retryable_4xx_raises_at_once(self):
+        self.create.side_effect = [_status_error(400), _completion("done")]
+
+        with self.assertRaises(APIStatusError):
+            complete("prompt")
+        self.assertEqual(self.create.call_count, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_retries_stop_at_max_retries(self):
+        self.create.side_effect = [_status_error(500)] * 5
+
+        with self.assertRaises(APIStatusError):
+            complete("prompt")
+        self.assertEqual(self.create.call_count, 4)
+
+    def test_retry_that_would_pass_the_deadline_raises(self):
+        self.create.side_effect = [_status_error(429, **{"retry-after": "30"}), _completion("done")]
+
+        with self.assertRaises(APIStatusError):
+            complete("prompt", timeout=10)
+        self.assertEqual(self.create.call_count, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_retries_stop_when_the_deadline_is_spent(self):
+        def slow_failure(**kwargs):
+            self.clock.now += 2
+            raise APIConnectionError(request=REQUEST)
+
+        self.create.side_effect = slow_failure
+        with mock.patch("app.llm.llm_utils._retry_delay", return_value=0.5):
+            with self.assertRaises(APIConnectionError):
+                complete("prompt", timeout=5)
+        # 0-2s, wait, 2.5-4.5s; a third attempt could not finish its wait before the deadline
+        self.assertEqual([call.kwargs["timeout"] for call in self.create.call_args_list], [5, 2.5])
+
+    def test_deadline_passed_while_waiting_raises_deadline_exceeded(self):
+        self.create.side_effect = [_status_error(503), _completion("done")]
+        # The process wakes up late, past the deadline
+        self.clock.sleep = lambda seconds: setattr(self.clock, "now", self.clock.now + 10)
+
+        with mock.patch("app.llm.llm_utils._retry_delay", return_value=1):
+            with self.assertRaises(LLMDeadlineExceeded):
+                complete("prompt", timeout=5)
+        self.assertEqual(self.create.call_count, 1)
+
+
+@override_settings(LLM_CACHE_ENABLED=True, LLM_CACHE_TTL=60, LLM_CACHE_MAX_ENTRIES=2)
+class CachedResponseTests(TestCase):
+    def setUp(self):
+        self.now = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        patcher = mock.patch("app.llm.llm_utils.timezone", SimpleNamespace(now=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.generate = mock.Mock(__name__="generate", side_effect=lambda resume, job: {"resume": resume, "job": job})
+        self.cached_generate = cached_response(version=1)(self.generate)
+
+    def _tick(self, seconds=1):
+        self.now += timedelta(seconds=seconds)
+
+    def test_repeated_call_is_served_from_the_cache(self):
+        first = self.cached_generate("resume", "job")
+        self._tick()
+        second = self.cached_generate("resume", "job")
+
+        self.assertEqual(first, second)
+        self.generate.assert_called_once()
+        self.assertEqual(LLMResponseCache.objects.get().hits, 1)
+
+    def test_different_inputs_are_cached_separately(self):
+        self.cached_generate("resume", "job")
+        self.cached_generate("resume", "other job")
+
+        self.assertEqual(self.generate.call_count, 2)
+        self.assertEqual(LLMResponseCache.objects.count(), 2)
+
+    def test_expired_entry_is_regenerated(self):
+        self.cached_generate("resume", "job")
+        self._tick(61)
+        self.cached_generate("resume", "job")
+
+        self.assertEqual(self.generate.call_count, 2)
+        self.assertEqual(LLMResponseCache.objects.count(), 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cached_generate("resume", "a")
+        self._tick()
+        self.cached_generate("resume", "b")
+        self._tick()
+        # Reading "a" makes "b" the least recently used entry
+        self.cached_generate("resume", "a")
+        self._tick()
+        self.cached_generate("resume", "c")
+        self.assertEqual(LLMResponseCache.objects.count(), 2)
+
+        self.generate.reset_mock()
+        self.cached_generate("resume", "a")
+        self.cached_generate("resume", "c")
+        self.generate.assert_not_called()
+        self.cached_generate("resume", "b")
+        self.generate.assert_called_once_with("resume", "b")
+
+    def test_raw_text_fallback_is_not_cached(self):
+        self.generate.side_effect = lambda resume, job: {"raw_text": "not json"}
+
+        self.cached_generate("resume", "job")
+        self.cached_generate("resume", "job")
+
+        self.assertEqual(self.generate.call_count, 2)
+        self.assertFalse(LLMResponseCache.objects.exists())
+
+    @override_settings(LLM_CACHE_ENABLED=False)
+    def test_disabled_cache_always_generates(self):
+        self.cached_generate("resume", "job")
+        self.cached_generate("resume", "job")
+
+        self.assertEqual(self.generate.call_count, 2)
+        self.assertFalse(LLMResponseCache.objects.exists())
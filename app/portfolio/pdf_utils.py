@@ -0,0 +1,116 @@
+import logging
+import multiprocessing
+import threading
+
+import PyPDF2
+from django.conf import settings
+from PyPDF2.errors import PyPdfError
+
+logger = logging.getLogger('django')
+
+
+class PdfExtractionError(Exception):
+    """Raised when the text of a PDF could not be extracted."""
+
+
+class PdfExtractionTimeout(PdfExtractionError):
+    """Raised when part of a PDF was not extracted within its deadline."""
+
+
+def _extract_pages(file_path: str, page_numbers: list) -> list:
+    """Pool task: extract the text of a batch of pages from a PDF file."""
+    reader = PyPDF2.PdfReader(file_path)
+    return [reader.pages[page_number].extract_text() or "" for page_number in page_numbers]
+
+
+class _ExtractionPool:
+    """
+    A spawned process pool shared by every extraction in this process.
+
+    A pool whose worker has to be killed is retired: new extractions get a fresh pool,
+    and the retired one is terminated once the last extraction using it has returned.
+    """
+
+    def __init__(self, processes: int):
+        # Spawned (not forked) children: the parent holds DB connections and background threads
+        self.pool = multiprocessing.get_context("spawn").Pool(processes=processes)
+        self.users = 0
+        self.retired = False
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _acquire_pool() -> _ExtractionPool:
+    """Return the shared pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _ExtractionPool(settings.PDF_EXTRACTION_MAX_WORKERS)
+        _pool.users += 1
+        return _pool
+
+
+def _release_pool(extraction_pool: _ExtractionPool, retire: bool = False):
+    """Stop using a pool; `retire` replaces it because one of its workers is stuck."""
+    global _pool
+    with _pool_lock:
+        extraction_pool.users -= 1
+        if retire and not extraction_pool.retired:
+            extraction_pool.retired = True
+            if _pool is extraction_pool:
+                _pool = None
+        terminate = extraction_pool.retired and extraction_pool.users == 0
+    if terminate:
+        extraction_pool.pool.terminate()
+
+
+def extract_pdf_text(
+        file_path: str,
+        pages_per_task: int = 4,
+        min_parallel_pages: int = 4,
+        page_timeout: float = 10.0,
+) -> str:
+    """
+    Extract text from a PDF, splitting long documents across the shared process pool.
+
+    A document of at most `min_parallel_pages` pages (most CVs) is extracted inline,
+    without any IPC. Longer documents are extracted in batches of `pages_per_task`
+    pages on a pool of PDF_EXTRACTION_MAX_WORKERS processes shared by every caller,
+    and the page texts are joined in order with a single join.
+
+    A batch that does not finish within `page_timeout` seconds per page raises
+    PdfExtractionTimeout instead of returning partial text, so incomplete text is never
+    stored, and the pool holding the stuck worker is replaced. An unreadable PDF raises
+    PdfExtractionError as well.
+    """
+    try:
+        page_count = len(PyPDF2.PdfReader(file_path).pages)
+        if page_count <= min_parallel_pages:
+            page_texts = _extract_pages(file_path, list(range(page_count)))
+            return "\n".join(page_texts) + "\n" if page_texts else ""
+    except PyPdfError as e:
+        raise PdfExtractionError(f"Could not read {file_path}: {str(e)}")
+
+    page_numbers = list(range(page_count))
+    batches = [page_numbers[i:i + pages_per_task] for i in range(0, page_count, pages_per_task)]
+    extraction_pool = _acquire_pool()
+    retire = False
+    try:
+        results = [extraction_pool.pool.apply_async(_extract_pages, (file_path, batch)) for batch in batches]
+        page_texts = []
+        for batch, result in zip(batches, results):
+            pages = f"pages {batch[0]}-{batch[-1]}"
+            try:
+                page_texts.extend(result.get(timeout=page_timeout * len(batch)))
+            except multiprocessing.TimeoutError:
+                logger.warning(f"PDF text extraction timed out for {pages} of {file_path}")
+                retire = True
+                raise PdfExtractionTimeout(f"Timed out extracting {pages} of {file_path}")
+            except PyPdfError as e:
+                raise PdfExtractionError(f"Could not extract {pages} of {file_path}: {str(e)}")
+    finally:
+        _release_pool(extraction_pool, retire=retire)
+
+    return "\n".join(page_texts) + "\n"
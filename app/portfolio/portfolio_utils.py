@@ -2,12 +2,11 @@ import json
 import os
 from html.parser import HTMLParser
 
-import PyPDF2
+from django.conf import settings
 from docx import Document
-from dotenv import load_dotenv
-from groq import Groq
 
-load_dotenv()
+from app.llm.llm_utils import complete
+from app.portfolio.pdf_utils import extract_pdf_text
 
 
 # -------------------------------
@@ -16,11 +15,12 @@ load_dotenv()
 
 def extract_text_from_pdf(file_path: str) -> str:
     """Extract text from a PDF file, concatenating all pages."""
-    reader = PyPDF2.PdfReader(file_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    return extract_pdf_text(
+        file_path,
+        pages_per_task=settings.PDF_EXTRACTION_PAGES_PER_TASK,
+        min_parallel_pages=settings.PDF_EXTRACTION_MIN_PARALLEL_PAGES,
+        page_timeout=settings.PDF_EXTRACTION_PAGE_TIMEOUT,
+    )
 
 
 def extract_text_from_docx(file_path: str) -> str:
@@ -116,30 +116,22 @@ REQUIREMENTS:
 15. Output clean, export-ready HTML starting with <!DOCTYPE html> and ending with </html>.
 """
 
-    # --- GROQ LLM integration example ---
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    html_content = response.choices[0].message.content.strip()
-    return html_content
+    # --- LLM gateway ---
+    return complete(prompt)
 
 
 # -------------------------------
 # 5️⃣ Full Pipeline Function
 # -------------------------------
 
-def process_resume(file_path: str, file_type: str) -> str:
+def process_resume(text: str) -> str:
     """
     Full end-to-end pipeline:
-    1. Extract text
-    2. Detect headings
-    3. Generate HTML via LLM
-    4. Validate HTML
-    5. Return export-ready HTML
+    1. Detect headings in the extracted resume text
+    2. Generate HTML via LLM
+    3. Validate HTML
+    4. Return export-ready HTML
     """
-    text = extract_resume_text(file_path, file_type)
     headings = detect_headings(text)
     html_content = generate_html_via_llm(text, headings)
     validate_html(html_content)
@@ -258,16 +250,8 @@ DESIGN & FUNCTIONAL REQUIREMENTS:
 - Clean export-ready HTML, starting with "<!DOCTYPE html>" and ending with "</html>".
 """
 
-    # --- GROQ LLM integration ---
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.6,
-        max_tokens=6000
-    )
-
-    html_content = response.choices[0].message.content.strip()
+    # --- LLM gateway ---
+    html_content = complete(prompt, temperature=0.6, max_tokens=6000)
 
     # Safety: ensure output starts/ends with proper HTML tags
     if not html_content.startswith("<!DOCTYPE html>"):
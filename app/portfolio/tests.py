@@ -1,3 +1,103 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from app.portfolio import pdf_utils
+from app.portfolio.pdf_utils import PdfExtractionError, extract_pdf_text
+
+
+def _write_pdf(page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page and return its path."""
+    page_count = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(page_count))
+        + b"] /Count %d >>" % page_count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 20 100 Td (" + text.encode("latin-1") + b") Tj ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    file_descriptor, file_path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(file_descriptor, "wb") as file_handle:
+        file_handle.write(data)
+    return file_path
+
+
+@override_settings(PDF_EXTRACTION_MAX_WORKERS=2)
+class ExtractPdfTextTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(cls._terminate_pool)
+
+    @staticmethod
+    def _terminate_pool():
+        if pdf_utils._pool is not None:
+            pdf_utils._pool.pool.terminate()
+            pdf_utils._pool = None
+
+    def _pdf(self, page_count):
+        file_path = _write_pdf([f"Page {i}" for i in range(page_count)])
+        self.addCleanup(os.remove, file_path)
+        return file_path
+
+    def test_every_page_is_extracted_in_order(self):
+        # Five batches of two pages, spread across both workers
+        text = extract_pdf_text(self._pdf(10), pages_per_task=2, min_parallel_pages=2)
+        self.assertEqual(text, "".join(f"Page {i}\n" for i in range(10)))
+
+    def test_short_document_is_extracted_inline(self):
+        with mock.patch("app.portfolio.pdf_utils._acquire_pool") as acquire_pool:
+            text = extract_pdf_text(self._pdf(2), min_parallel_pages=4)
+
+        acquire_pool.assert_not_called()
+        self.assertEqual(text, "Page 0\nPage 1\n")
+
+    def test_extractions_share_one_pool(self):
+        file_path = self._pdf(6)
+        extract_pdf_text(file_path, pages_per_task=2, min_parallel_pages=2)
+        pool = pdf_utils._pool
+
+        extract_pdf_text(file_path, pages_per_task=2, min_parallel_pages=2)
+        self.assertIs(pdf_utils._pool, pool)
+        self.assertEqual(pool.users, 0)
+
+    def test_timeout_raises_and_replaces_the_pool(self):
+        file_path = self._pdf(6)
+        extract_pdf_text(file_path, pages_per_task=2, min_parallel_pages=2)
+        pool = pdf_utils._pool
+
+        with self.assertRaises(PdfExtractionError):
+            extract_pdf_text(file_path, pages_per_task=2, min_parallel_pages=2, page_timeout=0)
+
+        self.assertTrue(pool.retired)
+        self.assertIsNone(pdf_utils._pool)
+        # The next extraction starts a fresh pool
+        text = extract_pdf_text(file_path, pages_per_task=2, min_parallel_pages=2)
+        self.assertEqual(text, "".join(f"Page {i}\n" for i in range(6)))
+        self.assertIsNot(pdf_utils._pool, pool)
+
+    def test_unreadable_pdf_raises(self):
+        file_descriptor, file_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(file_descriptor, "wb") as file_handle:
+            file_handle.write(b"not a pdf")
+        self.addCleanup(os.remove, file_path)
+
+        with self.assertRaises(PdfExtractionError):
+            extract_pdf_text(file_path)
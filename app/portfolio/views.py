@@ -5,21 +5,23 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
-from rest_framework.permissions import IsAuthenticated
 
-from app.analytics.analytics_utils import save_ai_analytics
+from app.analytics.analytics_utils import credit_required
 from app.analytics.models import AIAnalytics
+from app.generation.generation_utils import enqueue_generation_job
 from app.global_constants import ErrorMessage, SuccessMessage
-from app.portfolio.portfolio_utils import process_resume, generate_portfolio_from_qna, get_file_type
+from app.portfolio.portfolio_utils import get_file_type
 from app.utils import get_response_schema
+from permissions import IsUser
 
 
 # Create your views here.
 class PortfolioGenerateAPIView(GenericAPIView):
     """ View: Portfolio Generate API View """
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsUser]
 
+    @credit_required
     def post(self, request):
         # Check if the user has resume file
         if not request.user.resume_file:
@@ -32,29 +34,27 @@ class PortfolioGenerateAPIView(GenericAPIView):
 
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
                 ErrorMessage.BAD_REQUEST.value,
                 status.HTTP_400_BAD_REQUEST
             )
-        phtml_output = process_resume(file_path, file_type)
-
-        # save to ai analytics
-        save_ai_analytics(request.user, AIAnalytics.GenerationType.PORTFOLIO_FROM_RESUME, phtml_output)
 
+        # Generated by the generation worker; poll api/jobs/<job_id> for the html
+        job = enqueue_generation_job(request.user, AIAnalytics.GenerationType.PORTFOLIO_FROM_RESUME)
 
         return get_response_schema(
-            {"html": phtml_output},
-            SuccessMessage.RECORD_RETRIEVED.value,
-            status.HTTP_200_OK
+            {"job_id": job.pk, "status": job.status},
+            SuccessMessage.GENERATION_QUEUED.value,
+            status.HTTP_202_ACCEPTED
         )
 
 class PortfolioGenerateFromQNAAPIView(GenericAPIView):
     """View: Portfolio Generate API View"""
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsUser]
 
     resume_request_schema = openapi.Schema(
         type=openapi.TYPE_OBJECT,
@@ -169,20 +169,20 @@ class PortfolioGenerateFromQNAAPIView(GenericAPIView):
     @swagger_auto_schema(
         operation_description="Generate ATS-friendly LaTeX resume from user input",
         request_body=resume_request_schema,
-        responses={200: "Returns LLM prompt for LaTeX resume", 400: "Bad Request"}
+        responses={202: "Returns the id of the queued generation job", 400: "Bad Request"}
     )
+    @credit_required
     def post(self, request):
         # check if "name", "role", "bio", "email" in request data
         if "name" not in request.data or "role" not in request.data or "bio" not in request.data or "email" not in request.data:
             return get_response_schema({}, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
-        # Pass QnA dict to your generator function
-        html_output = generate_portfolio_from_qna(request.data)
 
-        # save to ai analytics
-        save_ai_analytics(request.user, AIAnalytics.GenerationType.PORTFOLIO_FROM_QNA, html_output)
+        # Generated by the generation worker from the QnA answers; poll api/jobs/<job_id> for the html
+        job = enqueue_generation_job(request.user, AIAnalytics.GenerationType.PORTFOLIO_FROM_QNA,
+                                     dict(request.data.items()))
 
         return get_response_schema(
-            {"html": html_output},
-            SuccessMessage.RECORD_RETRIEVED.value,
-            status.HTTP_200_OK,
+            {"job_id": job.pk, "status": job.status},
+            SuccessMessage.GENERATION_QUEUED.value,
+            status.HTTP_202_ACCEPTED,
         )
\ No newline at end of file
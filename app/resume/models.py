@@ -1,3 +1,29 @@
 from django.db import models
 
+
 # Create your models here.
+class ResumeText(models.Model):
+    """ Model: Extracted resume text, keyed by the SHA-256 of the uploaded file """
+
+    # Field declarations
+    sha256 = models.CharField(max_length=64, unique=True)
+    file_type = models.CharField(max_length=10)
+    text = models.TextField()
+
+    # Additional Field declarations
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
+
+
+class ResumeProfile(models.Model):
+    """ Model: Structured resume parse, keyed by the SHA-256 of the uploaded file """
+
+    # Field declarations
+    sha256 = models.CharField(max_length=64, unique=True)
+    profile = models.JSONField(default=dict)
+
+    # Additional Field declarations
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    is_active = models.BooleanField(default=True)
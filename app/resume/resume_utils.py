@@ -1,15 +1,30 @@
+import hashlib
 import json
-import os
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from typing import Dict, Optional
 
-from dotenv import load_dotenv
-from groq import Groq
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
 
-import re
+from app.llm.llm_utils import complete, complete_json, cached_response
+from app.portfolio.portfolio_utils import extract_resume_text, get_file_type
+from app.resume.models import ResumeText, ResumeProfile
 
-load_dotenv()
+logger = logging.getLogger('django')
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Bounded pool that processes freshly uploaded resumes off the request path
+_processing_executor = ThreadPoolExecutor(max_workers=settings.RESUME_PROCESSING_MAX_WORKERS,
+                                          thread_name_prefix="resume-processing")
+
+# Resume hashes whose profile this process is building, so a resume is never parsed twice at once
+_profiles_in_progress = set()
+_profiles_in_progress_lock = threading.Lock()
 
 # JSON robustness instructions
 JSON_INSTRUCTIONS = """
@@ -19,6 +34,241 @@ Important instructions for JSON robustness:
 - Follow the example structure provided for each function.
 """
 
+# Canonical sections of a parsed resume profile
+RESUME_PROFILE_SECTIONS = ("contact", "skills", "experience", "projects", "education")
+
+# Profile sections each prompt builder needs
+RESUME_SCORE_SECTIONS = ("skills", "experience", "projects", "education")
+KEYWORD_GAP_SECTIONS = ("skills", "experience", "projects")
+AUTO_REWRITE_SECTIONS = ("skills", "experience", "projects", "education")
+SKILL_GAP_SECTIONS = ("skills", "experience", "projects")
+CAREER_RECOMMENDATION_SECTIONS = ("skills", "experience", "education")
+
+
+def compute_file_hash(resume_file) -> str:
+    """Return the SHA-256 hex digest of an uploaded resume file."""
+    hasher = hashlib.sha256()
+    with resume_file.open("rb") as file_handle:
+        for chunk in file_handle.chunks():
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def store_resume_text(user) -> str:
+    """
+    Hash the user's resume file and persist its extracted text.
+
+    The text is stored once per distinct file content, so re-uploading the
+    same file (or two users sharing one) never triggers a second parse. An
+    extraction that fails or times out raises, so nothing is stored and the
+    next call parses the file again.
+    """
+    file_path, file_type = get_file_type(user)
+    # Uploads are hashed while they stream in; only older resumes are hashed here
+    resume_hash = user.resume_hash or compute_file_hash(user.resume_file)
+
+    resume_text = ResumeText.objects.filter(sha256=resume_hash).values_list("text", flat=True).first()
+    if resume_text is None:
+        resume_text = extract_resume_text(file_path, file_type)
+        ResumeText.objects.get_or_create(sha256=resume_hash, defaults={"file_type": file_type, "text": resume_text})
+
+    if user.resume_hash != resume_hash:
+        get_user_model().objects.filter(pk=user.pk).update(resume_hash=resume_hash)
+        user.resume_hash = resume_hash
+
+    return resume_text
+
+
+def get_resume_text(user) -> str:
+    """
+    Return the extracted text of the user's resume.
+
+    Reads from the content-addressed store filled at upload time and only
+    falls back to parsing the file for resumes uploaded before the store existed.
+    """
+    if user.resume_hash:
+        resume_text = ResumeText.objects.filter(sha256=user.resume_hash).values_list("text", flat=True).first()
+        if resume_text is not None:
+            return resume_text
+
+    return store_resume_text(user)
+
+
+def generate_resume_profile(resume_text: str) -> Dict:
+    """
+    Parse raw resume text into a canonical JSON profile using GROQ LLM.
+
+    Returns JSON with keys: contact, skills, experience, projects, education.
+    """
+    prompt = f"""
+Parse the resume below into a structured JSON profile.
+Keep the candidate's own wording, but drop filler, formatting artifacts and repeated text.
+Do not invent any information that is not present in the resume.
+
+Resume:
+{resume_text}
+
+Return a JSON object with exactly these keys:
+1. "contact": name, email, phone, location and profile links.
+2. "skills": flat list of technical and soft skills.
+3. "experience": list of roles with role, company, duration and up to 5 highlights each.
+4. "projects": list of projects with title, description and technologies.
+5. "education": list of degrees with degree, institution and year.
+
+**Important instructions for JSON robustness**:
+- Use double quotes for all keys and strings.
+- Use empty strings or empty lists for missing information.
+- Return only the JSON; do not add extra text or explanations.
+- Example structure:
+{{
+    "contact": {{"name": "Jane Doe", "email": "jane@example.com", "phone": "", "location": "Berlin", "links": ["https://github.com/janedoe"]}},
+    "skills": ["Python", "Django", "PostgreSQL", "Team leadership"],
+    "experience": [
+        {{"role": "Backend Engineer", "company": "TechCorp", "duration": "2022-2025", "highlights": ["Built REST APIs serving 1M requests/day"]}}
+    ],
+    "projects": [
+        {{"title": "CreatorPulse", "description": "AI newsletter automation platform", "technologies": ["Django", "Groq"]}}
+    ],
+    "education": [
+        {{"degree": "B.Tech Computer Science", "institution": "XYZ University", "year": "2022"}}
+    ]
+}}
+"""
+
+    return complete_json(prompt, temperature=0)
+
+
+def normalize_resume_profile(profile) -> Optional[Dict]:
+    """
+    Coerce an LLM profile response to the canonical sections.
+
+    Missing or mistyped sections become empty. Returns None when the response could
+    not be parsed or holds nothing usable.
+    """
+    if not isinstance(profile, dict) or "raw_text" in profile:
+        return None
+
+    normalized = {}
+    for section in RESUME_PROFILE_SECTIONS:
+        expected_type = dict if section == "contact" else list
+        value = profile.get(section)
+        normalized[section] = value if isinstance(value, expected_type) else expected_type()
+
+    return normalized if any(normalized.values()) else None
+
+
+def store_resume_profile(resume_hash: str, resume_text: str) -> Dict:
+    """
+    Build and persist the structured profile for a resume.
+
+    A response that cannot be parsed is stored as an empty profile. The prompt builders
+    fall back to the raw text for it, and it is parsed again once it is older than
+    RESUME_PROFILE_RETRY_AFTER.
+    """
+    profile = normalize_resume_profile(generate_resume_profile(resume_text))
+    if profile is not None:
+        ResumeProfile.objects.update_or_create(sha256=resume_hash, defaults={"profile": profile})
+        return profile
+
+    logger.warning(f"Could not parse resume profile for {resume_hash}")
+    resume_profile, created = ResumeProfile.objects.get_or_create(sha256=resume_hash, defaults={"profile": {}})
+    if not created and not resume_profile.profile:
+        # Restart the retry delay
+        resume_profile.save(update_fields=["updated"])
+    return resume_profile.profile
+
+
+def needs_resume_profile(resume_hash: str) -> bool:
+    """True when a resume has no profile, or only a failed parse that is due for a retry."""
+    retry_before = timezone.now() - timedelta(seconds=settings.RESUME_PROFILE_RETRY_AFTER)
+    return not (
+        ResumeProfile.objects.filter(sha256=resume_hash)
+        .exclude(profile={}, updated__lte=retry_before)
+        .exists()
+    )
+
+
+def build_resume_profile(resume_hash: str, resume_text: str):
+    """Build the profile of a resume unless it is usable or already being built in this process."""
+    with _profiles_in_progress_lock:
+        if resume_hash in _profiles_in_progress:
+            return
+        _profiles_in_progress.add(resume_hash)
+
+    try:
+        if needs_resume_profile(resume_hash):
+            store_resume_profile(resume_hash, resume_text)
+    finally:
+        with _profiles_in_progress_lock:
+            _profiles_in_progress.discard(resume_hash)
+
+
+def process_resume_upload(user):
+    """Fill the extracted-text and profile stores for a freshly uploaded resume."""
+    resume_text = store_resume_text(user)
+    build_resume_profile(user.resume_hash, resume_text)
+
+
+def _build_profile_task(resume_hash: str, resume_text: str):
+    """Pool task: build the profile of a resume an AI view had to answer from the raw text."""
+    try:
+        build_resume_profile(resume_hash, resume_text)
+    except Exception as e:
+        logger.warning(f"Could not build resume profile for {resume_hash}: {str(e)}")
+    finally:
+        connection.close()
+
+
+def _process_resume_task(user_id: int):
+    """Pool task: process the user's current resume."""
+    try:
+        user = get_user_model().objects.only("pk", "resume_file", "resume_hash").get(pk=user_id)
+        if user.resume_file:
+            process_resume_upload(user)
+    except Exception as e:
+        # The AI views fall back to the raw text and rebuild the profile later, so a failure here only costs tokens
+        logger.warning(f"Could not process resume for user {user_id}: {str(e)}")
+    finally:
+        connection.close()
+
+
+def queue_resume_processing(user_id: int):
+    """
+    Extract the text and build the profile of the user's resume in the background.
+
+    Called from transaction.on_commit once the resume file and its hash are stored, so
+    losing the task only loses the warm-up, never the upload.
+    """
+    _processing_executor.submit(_process_resume_task, user_id)
+
+
+def format_resume_sections(profile: Dict, sections) -> str:
+    """Render the requested profile sections as compact JSON for a prompt."""
+    return json.dumps({section: profile.get(section) for section in sections}, ensure_ascii=False,
+                      separators=(",", ":"))
+
+
+def get_resume_context(user, sections) -> str:
+    """
+    Return the parts of the user's resume a prompt builder needs.
+
+    Uses the structured profile produced at upload time. Until a usable profile exists
+    the full extracted text is returned, and a missing or failed profile is rebuilt in
+    the background rather than on the request.
+    """
+    if not user.resume_hash:
+        get_resume_text(user)
+
+    profile = ResumeProfile.objects.filter(sha256=user.resume_hash).values_list("profile", flat=True).first()
+    if profile:
+        return format_resume_sections(profile, sections)
+
+    resume_text = get_resume_text(user)
+    if user.resume_hash not in _profiles_in_progress and needs_resume_profile(user.resume_hash):
+        _processing_executor.submit(_build_profile_task, user.resume_hash, resume_text)
+    return resume_text
+
+
 # def generate_latex_prompt(data: dict) -> str:
 #     """
 #     Generates an ATS-friendly LaTeX resume from user input JSON via GROQ LLM.
@@ -280,25 +530,10 @@ STRICT FORMAT RULES (must comply to keep resume exactly one page):
 9. Never add new sections or reorder existing ones.
 """
 
-    # --- GROQ API Call ---
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY not found in environment variables")
-
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.5,
-        max_tokens=7000
-    )
-
-    choices = getattr(response, "choices", None)
-    if not choices or not hasattr(choices[0], "message"):
-        raise RuntimeError("Unexpected response from GROQ API")
-
-    latex_content = choices[0].message.content.strip()
-    return latex_content
+    # --- LLM gateway ---
+    return complete(prompt, temperature=0.5, max_tokens=7000)
 
+@cached_response(version=1)
 def generate_resume_score(resume_text: str, job_description: str) -> Dict:
     """
     Generate a structured JSON score for a resume against a job description using GROQ LLM.
@@ -334,22 +569,10 @@ Return the result as a JSON object with keys:
 }}
 """
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    content = response.choices[0].message.content.strip()
-
-    try:
-        result_json = json.loads(content)
-    except json.JSONDecodeError:
-        # fallback if JSON parsing fails
-        result_json = {"raw_text": content}
-
-    return result_json
+    return complete_json(prompt)
 
 
+@cached_response(version=1)
 def keyword_gap_analysis(resume_text: str, job_description: str) -> Dict:
     """
     Compare resume against job description and return matched and missing keywords.
@@ -374,17 +597,7 @@ Job Description:
     "missing_keywords": ["Azure Cognitive Services", "Autogen", "Power Automate"]
 }}
 """
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    content = response.choices[0].message.content.strip()
-
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {"raw_text": content}
+    return complete_json(prompt)
 
 
 # 2. Auto-Rewrite / Enhancement Suggestions
@@ -414,18 +627,9 @@ Job Description:
     "suggested_keywords_added": ["Azure Cognitive Services", "Autogen"]
 }}
 """
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    content = response.choices[0].message.content.strip()
-
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {"raw_text": content}
+    return complete_json(prompt)
 
+@cached_response(version=1)
 def generate_skill_gap(resume_text: str, job_description: str) -> Dict:
     """
     Compare resume against job description and return matched, missing, and extended skill insights.
@@ -498,18 +702,9 @@ Job Description:
 }}
 """
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    content = response.choices[0].message.content.strip()
-
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {"raw_text": content}
+    return complete_json(prompt)
 
+@cached_response(version=1)
 def generate_career_recommendation(resume_text: str, job_description: str) -> Dict:
     """
     Analyze the candidate's resume and job description to generate personalized
@@ -615,14 +810,4 @@ You must:
 }}
 """
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    content = response.choices[0].message.content.strip()
-
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {"raw_text": content}
\ No newline at end of file
+    return complete_json(prompt)
\ No newline at end of file
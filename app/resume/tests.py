@@ -1,3 +1,183 @@
-from django.test import TestCase
+import hashlib
+import json
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.analytics.models import UserCredit
+from app.global_constants import ErrorMessage, RoleConstants
+from app.portfolio.pdf_utils import PdfExtractionError, PdfExtractionTimeout
+from app.resume.models import ResumeProfile, ResumeText
+from app.resume.resume_utils import RESUME_SCORE_SECTIONS, build_resume_profile, format_resume_sections, \
+    get_resume_context, get_resume_text, store_resume_profile
+from app.role.models import Role
+from app.user.authentication import ClaimsRefreshToken
+
+
+class ResumeTestCase(TestCase):
+    content = b"%PDF-1.4\nresume"
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def _user(self, email):
+        user = get_user_model().objects.create_user(email, "password", role=self.role)
+        user.resume_file.save("resume.pdf", ContentFile(self.content))
+        return user
+
+
+class ResumeTextStoreTests(ResumeTestCase):
+    @mock.patch("app.resume.resume_utils.extract_resume_text", return_value="Python developer")
+    def test_resume_is_parsed_once_per_hash(self, extract_resume_text):
+        user = self._user("first@example.com")
+
+        self.assertEqual(get_resume_text(user), "Python developer")
+        self.assertEqual(user.resume_hash, self.sha256)
+        self.assertEqual(ResumeText.objects.get(sha256=self.sha256).text, "Python developer")
+
+        # Same user again, a fresh copy of the row, and another user uploading the same file
+        self.assertEqual(get_resume_text(user), "Python developer")
+        self.assertEqual(get_resume_text(get_user_model().objects.get(pk=user.pk)), "Python developer")
+        self.assertEqual(get_resume_text(self._user("second@example.com")), "Python developer")
+
+        extract_resume_text.assert_called_once()
+        self.assertEqual(ResumeText.objects.count(), 1)
+
+    @mock.patch("app.resume.resume_utils.extract_resume_text", side_effect=PdfExtractionError("timed out"))
+    def test_failed_extraction_is_not_stored(self, extract_resume_text):
+        user = self._user("first@example.com")
+
+        with self.assertRaises(PdfExtractionError):
+            get_resume_context(user, RESUME_SCORE_SECTIONS)
+
+        self.assertFalse(ResumeText.objects.exists())
+        self.assertFalse(ResumeProfile.objects.exists())
+
+
+
+PROFILE = {
+    "contact": {"name": "Jane Doe"},
+    "skills": ["Python", "Django"],
+    "experience": [{"role": "Backend Engineer", "company": "TechCorp"}],
+    "projects": [],
+    "education": [{"degree": "B.Tech"}],
+}
+
+
+class ResumeProfileTests(ResumeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self._user("first@example.com")
+        ResumeText.objects.create(sha256=self.sha256, file_type="pdf", text="Raw resume text")
+        get_user_model().objects.filter(pk=self.user.pk).update(resume_hash=self.sha256)
+        self.user.resume_hash = self.sha256
+
+        patcher = mock.patch("app.resume.resume_utils._processing_executor")
+        self.executor = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_format_resume_sections_keeps_only_the_requested_sections(self):
+        text = format_resume_sections(PROFILE, ("skills", "education"))
+
+        self.assertEqual(json.loads(text), {"skills": ["Python", "Django"], "education": [{"degree": "B.Tech"}]})
+
+    def test_context_uses_the_profile(self):
+        ResumeProfile.objects.create(sha256=self.sha256, profile=PROFILE)
+
+        context = get_resume_context(self.user, RESUME_SCORE_SECTIONS)
+
+        self.assertEqual(json.loads(context), {section: PROFILE[section] for section in RESUME_SCORE_SECTIONS})
+        self.executor.submit.assert_not_called()
+
+    @mock.patch("app.resume.resume_utils.complete_json")
+    def test_missing_profile_falls_back_to_raw_text_and_is_built_later(self, complete_json):
+        self.assertEqual(get_resume_context(self.user, RESUME_SCORE_SECTIONS), "Raw resume text")
+
+        # No LLM call on the request; the profile is built in the background
+        complete_json.assert_not_called()
+        self.executor.submit.assert_called_once()
+
+    @mock.patch("app.resume.resume_utils.complete_json")
+    def test_failed_profile_falls_back_to_raw_text_until_retried(self, complete_json):
+        ResumeProfile.objects.create(sha256=self.sha256, profile={})
+
+        self.assertEqual(get_resume_context(self.user, RESUME_SCORE_SECTIONS), "Raw resume text")
+        self.executor.submit.assert_not_called()
+
+        with override_settings(RESUME_PROFILE_RETRY_AFTER=-1):
+            self.assertEqual(get_resume_context(self.user, RESUME_SCORE_SECTIONS), "Raw resume text")
+        self.executor.submit.assert_called_once()
+        complete_json.assert_not_called()
+
+    @mock.patch("app.resume.resume_utils.complete_json", return_value={"raw_text": "not json"})
+    def test_unparsable_profile_is_stored_as_a_retry_marker(self, complete_json):
+        self.assertEqual(store_resume_profile(self.sha256, "Raw resume text"), {})
+        self.assertEqual(ResumeProfile.objects.get(sha256=self.sha256).profile, {})
+
+        # Not retried until RESUME_PROFILE_RETRY_AFTER has passed
+        build_resume_profile(self.sha256, "Raw resume text")
+        complete_json.assert_called_once()
+
+        complete_json.return_value = PROFILE
+        with override_settings(RESUME_PROFILE_RETRY_AFTER=-1):
+            build_resume_profile(self.sha256, "Raw resume text")
+        self.assertEqual(ResumeProfile.objects.get(sha256=self.sha256).profile, PROFILE)
+
+    @mock.patch("app.resume.resume_utils.complete_json")
+    def test_partial_and_malformed_sections_are_normalized(self, complete_json):
+        complete_json.return_value = {"skills": ["Python"], "experience": "TechCorp", "contact": ["Jane"],
+                                      "extra": "dropped"}
+
+        profile = store_resume_profile(self.sha256, "Raw resume text")
+
+        self.assertEqual(profile, {"contact": {}, "skills": ["Python"], "experience": [], "projects": [],
+                                   "education": []})
+        self.assertEqual(ResumeProfile.objects.get(sha256=self.sha256).profile, profile)
+
+    @mock.patch("app.resume.resume_utils.complete_json")
+    def test_response_without_any_section_is_a_failed_parse(self, complete_json):
+        for response in (["Python"], {"summary": "Python developer"}, {"skills": "", "education": None}):
+            complete_json.return_value = response
+            self.assertEqual(store_resume_profile(self.sha256, "Raw resume text"), {})
+
+
+@override_settings(AI_CREDIT_LIMIT=3)
+class ResumeExtractionErrorTests(ResumeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self._user("first@example.com")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(self.user).access_token}")
+
+    def _score(self):
+        return self.client.post("/api/resume/score", {"job_description": "Python developer"}, format="json")
+
+    @mock.patch("app.resume.resume_utils.extract_resume_text", side_effect=PdfExtractionTimeout("timed out"))
+    def test_timed_out_extraction_is_service_unavailable(self, extract_resume_text):
+        response = self._score()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["results"][settings.REST_FRAMEWORK["NON_FIELD_ERRORS_KEY"]], [ErrorMessage.RESUME_PROCESSING_TIMEOUT.value])
+        self.assertEqual(UserCredit.objects.get(user=self.user).balance, 3)
+
+    @mock.patch("app.resume.resume_utils.extract_resume_text", side_effect=PdfExtractionError("broken"))
+    def test_unreadable_resume_is_bad_request(self, extract_resume_text):
+        response = self._score()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["results"][settings.REST_FRAMEWORK["NON_FIELD_ERRORS_KEY"]], [ErrorMessage.RESUME_FILE_UNREADABLE.value])
+        self.assertEqual(UserCredit.objects.get(user=self.user).balance, 3)
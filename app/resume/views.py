@@ -4,12 +4,14 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 
-from app.analytics.analytics_utils import save_ai_analytics
+from app.analytics.analytics_utils import credit_required, save_ai_analytics
 from app.analytics.models import AIAnalytics
+from app.generation.generation_utils import enqueue_generation_job
 from app.global_constants import ErrorMessage, SuccessMessage
-from app.portfolio.portfolio_utils import get_file_type, extract_resume_text
-from app.resume.resume_utils import generate_latex_prompt, generate_resume_score, keyword_gap_analysis, \
-    auto_rewrite_resume, generate_skill_gap, generate_career_recommendation
+from app.portfolio.portfolio_utils import get_file_type
+from app.resume.resume_utils import generate_resume_score, keyword_gap_analysis, \
+    auto_rewrite_resume, generate_skill_gap, generate_career_recommendation, get_resume_context, RESUME_SCORE_SECTIONS, \
+    KEYWORD_GAP_SECTIONS, AUTO_REWRITE_SECTIONS, SKILL_GAP_SECTIONS, CAREER_RECOMMENDATION_SECTIONS
 from app.utils import get_response_schema
 from permissions import IsUser
 
@@ -131,19 +133,19 @@ class ResumeGenerateAPIView(GenericAPIView):
     @swagger_auto_schema(
         operation_description="Generate ATS-friendly LaTeX resume from user input",
         request_body=resume_request_schema,
-        responses={200: "Returns LLM prompt for LaTeX resume", 400: "Bad Request"}
+        responses={202: "Returns the id of the queued generation job", 400: "Bad Request"}
     )
+    @credit_required
     def post(self, request):
         # check if "name", "role", "bio", "email" in request data
         if "name" not in request.data or "role" not in request.data or "bio" not in request.data or "email" not in request.data:
             return get_response_schema({}, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
 
-        latex_resume = generate_latex_prompt(request.data)
+        # Generated by the generation worker; poll api/jobs/<job_id> for the resume
+        job = enqueue_generation_job(request.user, AIAnalytics.GenerationType.RESUME, dict(request.data.items()))
 
-        # save to ai analytics
-        save_ai_analytics(request.user, AIAnalytics.GenerationType.RESUME, latex_resume)
-
-        return get_response_schema({"resume": latex_resume}, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+        return get_response_schema({"job_id": job.pk, "status": job.status}, SuccessMessage.GENERATION_QUEUED.value,
+                                   status.HTTP_202_ACCEPTED)
 
 
 class ResumeScoreAPIView(GenericAPIView):
@@ -157,6 +159,7 @@ class ResumeScoreAPIView(GenericAPIView):
             }
         )
     )
+    @credit_required
     def post(self, request):
 
         # check if job_Description is none
@@ -175,7 +178,7 @@ class ResumeScoreAPIView(GenericAPIView):
             )
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -183,7 +186,7 @@ class ResumeScoreAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, RESUME_SCORE_SECTIONS)
 
         result = generate_resume_score(resume_text, request.data.get("job_description"))
 
@@ -204,6 +207,7 @@ class ResumeKeywordGapAPIView(GenericAPIView):
             }
         )
     )
+    @credit_required
     def post(self, request):
 
         # check if job_Description is none
@@ -222,7 +226,7 @@ class ResumeKeywordGapAPIView(GenericAPIView):
             )
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -230,7 +234,7 @@ class ResumeKeywordGapAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, KEYWORD_GAP_SECTIONS)
 
         result = keyword_gap_analysis(resume_text, request.data.get("job_description"))
 
@@ -252,6 +256,7 @@ class ResumeAutoRewriteAPIView(GenericAPIView):
             }
         )
     )
+    @credit_required
     def post(self, request):
         # check if job_Description is none
         if "job_description" not in request.data:
@@ -269,7 +274,7 @@ class ResumeAutoRewriteAPIView(GenericAPIView):
             )
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -277,7 +282,7 @@ class ResumeAutoRewriteAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, AUTO_REWRITE_SECTIONS)
 
         result = auto_rewrite_resume(resume_text, request.data.get("job_description"), request.data.get("tone", "Professional"))
 
@@ -298,6 +303,7 @@ class ResumeSkillsGapAPIView(GenericAPIView):
             }
         )
     )
+    @credit_required
     def post(self, request):
 
         # check if job_Description is none
@@ -316,7 +322,7 @@ class ResumeSkillsGapAPIView(GenericAPIView):
             )
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -324,7 +330,7 @@ class ResumeSkillsGapAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, SKILL_GAP_SECTIONS)
 
         result = generate_skill_gap(resume_text, request.data.get("job_description"))
 
@@ -346,6 +352,7 @@ class ResumeCareerRecommendationAPIView(GenericAPIView):
             }
         )
     )
+    @credit_required
     def post(self, request):
 
         # check if job_Description is none
@@ -364,7 +371,7 @@ class ResumeCareerRecommendationAPIView(GenericAPIView):
             )
 
         try:
-            file_path, file_type = get_file_type(request.user)
+            get_file_type(request.user)
         except ValueError:
             return get_response_schema(
                 {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.UNSUPPORTED_FILE_TYPE.value]},
@@ -372,7 +379,7 @@ class ResumeCareerRecommendationAPIView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST
             )
 
-        resume_text = extract_resume_text(file_path, file_type)
+        resume_text = get_resume_context(request.user, CAREER_RECOMMENDATION_SECTIONS)
 
         result = generate_career_recommendation(resume_text, request.data.get("job_description"))
 
@@ -42,9 +42,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # REST Framework
     'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',
 
     # Swagger Documentation
     'drf_yasg',
@@ -62,6 +64,8 @@ INSTALLED_APPS = [
     'app.interview',
     'app.job_source',
     'app.analytics',
+    'app.llm',
+    'app.generation',
 ]
 
 MIDDLEWARE = [
@@ -121,6 +125,14 @@ DATABASES = {
     }
 }
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'django_cache'),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -176,7 +188,7 @@ SWAGGER_SETTINGS = {
 # Rest framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app.user.authentication.ClaimsJWTAuthentication',
     ),
     'NON_FIELD_ERRORS_KEY': 'detail',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -190,7 +202,7 @@ AUTH_USER_MODEL = 'user.User'
 # Configure JWT authentication settings
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=10000),
+    'ACCESS_TOKEN_LIFETIME': timedelta(seconds=int(os.getenv('ACCESS_TOKEN_LIFETIME', 15 * 60))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=365),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': False,
@@ -280,4 +292,67 @@ LOGGING = {
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
+
+# Resume PDF extraction
+PDF_EXTRACTION_MAX_WORKERS = int(os.getenv('PDF_EXTRACTION_MAX_WORKERS', 2))
+PDF_EXTRACTION_PAGES_PER_TASK = int(os.getenv('PDF_EXTRACTION_PAGES_PER_TASK', 4))
+PDF_EXTRACTION_MIN_PARALLEL_PAGES = int(os.getenv('PDF_EXTRACTION_MIN_PARALLEL_PAGES', 4))
+PDF_EXTRACTION_PAGE_TIMEOUT = float(os.getenv('PDF_EXTRACTION_PAGE_TIMEOUT', 10))
+
+# LLM gateway
+GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 60))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', 5))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 3))
+LLM_RETRY_BACKOFF = float(os.getenv('LLM_RETRY_BACKOFF', 1))
+LLM_RETRY_MAX_BACKOFF = float(os.getenv('LLM_RETRY_MAX_BACKOFF', 20))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', 20))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', 10))
+
+# LLM response cache
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'True') == 'True'
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 60 * 60 * 24))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 10000))
+
+# Job recommendations
+JOB_MATCH_MAX_WORKERS = int(os.getenv('JOB_MATCH_MAX_WORKERS', 8))
+JOB_MATCH_DEADLINE = float(os.getenv('JOB_MATCH_DEADLINE', 20))
+JOB_PRERANK_TOP_N = int(os.getenv('JOB_PRERANK_TOP_N', 5))
+JOB_PRERANK_MIN_SCORE = float(os.getenv('JOB_PRERANK_MIN_SCORE', 0))
+JOB_FEED_POLL_INTERVAL = int(os.getenv('JOB_FEED_POLL_INTERVAL', 15 * 60))
+JOB_FEED_MIN_POLL_INTERVAL = int(os.getenv('JOB_FEED_MIN_POLL_INTERVAL', 5 * 60))
+JOB_FEED_MAX_POLL_INTERVAL = int(os.getenv('JOB_FEED_MAX_POLL_INTERVAL', 6 * 60 * 60))
+JOB_FEED_WORKER_TICK = int(os.getenv('JOB_FEED_WORKER_TICK', 60))
+JOB_POSTING_RETENTION_DAYS = int(os.getenv('JOB_POSTING_RETENTION_DAYS', 30))
+
+# AI credits
+AI_CREDIT_LIMIT = int(os.getenv('AI_CREDIT_LIMIT', 100))
+
+# Analytics writes
+ANALYTICS_BUFFERED_WRITES = os.getenv('ANALYTICS_BUFFERED_WRITES', 'True') == 'True'
+ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', 50))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', 2))
+ANALYTICS_WRITE_MAX_RETRIES = int(os.getenv('ANALYTICS_WRITE_MAX_RETRIES', 3))
+
+# Admin dashboard
+DASHBOARD_SUMMARY_CACHE_TTL = int(os.getenv('DASHBOARD_SUMMARY_CACHE_TTL', 5 * 60))
+
+# Refresh token blacklist filter
+TOKEN_BLACKLIST_FILTER_CAPACITY = int(os.getenv('TOKEN_BLACKLIST_FILTER_CAPACITY', 100000))
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = float(os.getenv('TOKEN_BLACKLIST_FILTER_ERROR_RATE', 0.001))
+TOKEN_BLACKLIST_FILTER_POLL_INTERVAL = float(os.getenv('TOKEN_BLACKLIST_FILTER_POLL_INTERVAL', 5))
+TOKEN_BLACKLIST_FILTER_POLL_OVERLAP = int(os.getenv('TOKEN_BLACKLIST_FILTER_POLL_OVERLAP', 1000))
+TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL = float(os.getenv('TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL', 60 * 60))
+
+# Resume uploads
+RESUME_UPLOAD_MAX_SIZE = int(os.getenv('RESUME_UPLOAD_MAX_SIZE', 5 * 1024 * 1024))
+RESUME_PROCESSING_MAX_WORKERS = int(os.getenv('RESUME_PROCESSING_MAX_WORKERS', 2))
+RESUME_PROFILE_RETRY_AFTER = int(os.getenv('RESUME_PROFILE_RETRY_AFTER', 60 * 60))
+
+# Generation jobs
+GENERATION_WORKER_POLL_INTERVAL = float(os.getenv('GENERATION_WORKER_POLL_INTERVAL', 1))
+GENERATION_JOB_HEARTBEAT_INTERVAL = float(os.getenv('GENERATION_JOB_HEARTBEAT_INTERVAL', 30))
+GENERATION_JOB_HEARTBEAT_TIMEOUT = int(os.getenv('GENERATION_JOB_HEARTBEAT_TIMEOUT', 2 * 60))
+GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv('GENERATION_JOB_MAX_ATTEMPTS', 2))
+GENERATION_JOB_RETENTION_DAYS = int(os.getenv('GENERATION_JOB_RETENTION_DAYS', 7))
@@ -47,6 +47,7 @@ urlpatterns = [
     path('api/interview/', include('app.interview.urls')),
     path('api/job-source/', include('app.job_source.urls')),
     path('api/analytics/', include('app.analytics.urls')),
+    path('api/jobs/', include('app.generation.urls')),
 
 
     # Documentation
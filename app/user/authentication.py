@@ -0,0 +1,168 @@
+import copy
+
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from app.user.user_utils import token_blacklist_filter
+
+# Claims embedded in every token so requests can be authorized without loading the user
+ROLE_CLAIM = "role_id"
+IS_ACTIVE_CLAIM = "is_active"
+TOKEN_VERSION_CLAIM = "token_version"
+USER_CLAIMS = (ROLE_CLAIM, IS_ACTIVE_CLAIM, TOKEN_VERSION_CLAIM)
+
+
+def set_user_claims(token, user):
+    token[ROLE_CLAIM] = user.role_id
+    token[IS_ACTIVE_CLAIM] = user.is_active
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user's role, active flag and token version; copied to its access tokens.
+
+    The blacklist is checked against the in-process JTI filter first; the database is
+    only asked about filter hits.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user so the outstanding token row stores the token with its claims
+        token = set_user_claims(super(BlacklistMixin, cls).for_user(user), user)
+        OutstandingToken.objects.create(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token["exp"]),
+        )
+        return token
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in token_blacklist_filter:
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        token_blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    The authenticated user, built from the access token claims.
+
+    id, role_id, is_active and token_version are read from the token. Any other attribute,
+    ORM use or save() loads the User row on first access, once per request.
+    """
+
+    def __init__(self, token):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: self._load_user(user_id))
+        self.__dict__["_token"] = token
+
+    @staticmethod
+    def _load_user(user_id):
+        try:
+            return get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    @property
+    def id(self):
+        return self.__dict__["_token"][api_settings.USER_ID_CLAIM]
+
+    pk = id
+
+    @property
+    def role_id(self):
+        return self.__dict__["_token"][ROLE_CLAIM]
+
+    @property
+    def is_active(self):
+        return self.__dict__["_token"][IS_ACTIVE_CLAIM]
+
+    @property
+    def token_version(self):
+        return self.__dict__["_token"][TOKEN_VERSION_CLAIM]
+
+    def __bool__(self):
+        # Permission checks start with `request.user and ...`; truthiness must not load the row
+        return True
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def __str__(self):
+        return f"User {self.id}"
+
+    # SimpleLazyObject copies an unloaded object as a plain SimpleLazyObject, dropping the token
+    def __copy__(self):
+        if self._wrapped is empty:
+            return type(self)(self.__dict__["_token"])
+        return copy.copy(self._wrapped)
+
+    def __deepcopy__(self, memo):
+        if self._wrapped is empty:
+            result = type(self)(copy.deepcopy(self.__dict__["_token"], memo))
+            memo[id(self)] = result
+            return result
+        return copy.deepcopy(self._wrapped, memo)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the role / active claims of the access token.
+
+    Access tokens are short-lived and the refresh endpoint checks the user's token_version,
+    so a deactivated user or a revoked token keeps access for at most one access token
+    lifetime. Endpoints that change credentials or accounts re-check the user with the
+    IsCurrentAccount permission. Tokens issued before the claims existed fall back to the
+    database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        if not validated_token[IS_ACTIVE_CLAIM]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return ClaimsUser(validated_token)
+
+
+def verify_current_account(request):
+    """
+    Load the user behind the request's token and check it against the database.
+
+    Rejects a deactivated account or a revoked token, and replaces the claims user on the
+    request with the loaded row.
+    """
+    claims_user = request.user
+    if not isinstance(claims_user, ClaimsUser):
+        # Tokens without claims were already loaded (and checked) by get_user
+        return
+
+    user = claims_user._load_user(claims_user.id)
+    if not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if user.token_version != claims_user.token_version:
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+    request.user = user
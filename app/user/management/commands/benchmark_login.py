@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth import get_user_model, login
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from app.global_constants import RoleConstants
+from app.role.models import Role
+from app.user.authentication import ClaimsRefreshToken
+from app.user.serializers import UserDisplaySerializer
+from app.user.user_utils import update_last_login, verify_password
+
+PASSWORD = "benchmark-password"
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Measure successful logins per second on one core, through the previous login path "
+            "(check_password, session login, full user save) and the current one (verify_password, "
+            "single-column last_login update). Runs in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=100, help="Logins timed per path.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                role, _ = Role.objects.get_or_create(id=RoleConstants.USER.value, defaults={"name": "Regular User"})
+                email = "login-benchmark@example.com"
+                get_user_model().objects.create_user(email, PASSWORD, role=role)
+
+                request = RequestFactory().post("/api/user/login")
+                SessionMiddleware(lambda request: None).process_request(request)
+
+                results = [
+                    ("Previous", self._measure(lambda: self._previous_login(request, email), options["logins"])),
+                    ("Current", self._measure(lambda: self._current_login(email), options["logins"])),
+                ]
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        for name, rate in results:
+            self.stdout.write(f"{name + ':':<10} {rate:8.1f} logins/sec on one core")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {results[1][1] / results[0][1]:.2f}x"))
+
+    @staticmethod
+    def _measure(login_once, count: int) -> float:
+        login_once()  # Warm-up
+        start = time.perf_counter()
+        for _ in range(count):
+            login_once()
+        return count / (time.perf_counter() - start)
+
+    @staticmethod
+    def _issue_tokens(user):
+        refresh = ClaimsRefreshToken.for_user(user)
+        return str(refresh), str(refresh.access_token), UserDisplaySerializer(user).data
+
+    def _previous_login(self, request, email):
+        user = get_user_model().objects.filter(email=email, is_active=True).first()
+        assert user.check_password(PASSWORD)
+        login(request, user)
+        user.save()
+        return self._issue_tokens(user)
+
+    def _current_login(self, email):
+        user = get_user_model().objects.select_related("role").filter(email=email, is_active=True).first()
+        assert verify_password(user, PASSWORD)
+        update_last_login(user)
+        return self._issue_tokens(user)
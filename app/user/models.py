@@ -2,8 +2,10 @@
 from datetime import time
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
+from django.contrib.postgres.indexes import OpClass
 from django.core.validators import FileExtensionValidator
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 from app.role.models import Role
@@ -40,6 +42,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     linkedin_url = models.URLField(blank=True, null=True)
     github_url = models.URLField(blank=True, null=True)
     resume_file = models.FileField(upload_to='resumes/', blank=True, null=True)
+    resume_hash = models.CharField(max_length=64, blank=True, null=True)
 
 
     # Timestamps
@@ -47,6 +50,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     updated = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    # Bumped to revoke outstanding refresh tokens (access tokens carry it as a claim)
+    token_version = models.PositiveIntegerField(default=0)
+
     # Use email as username
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
@@ -54,6 +60,18 @@ class User(AbstractBaseUser, PermissionsMixin):
     # Use custom manager
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            # Admin user list: users of a role, most recently updated first (keyset on updated, pk)
+            models.Index(fields=["role", "-updated", "-id"], name="user_role_updated"),
+            # Dashboard count / latest registration: active users of a role
+            models.Index(fields=["role", "-created"], condition=models.Q(is_active=True), name="user_role_active_created"),
+            # istartswith compiles to UPPER(column) LIKE UPPER(pattern) on Postgres
+            models.Index(OpClass(Upper("email"), name="text_pattern_ops"), name="user_email_upper_prefix"),
+            models.Index(OpClass(Upper("first_name"), name="text_pattern_ops"), name="user_first_name_upper_prefix"),
+            models.Index(OpClass(Upper("last_name"), name="text_pattern_ops"), name="user_last_name_upper_prefix"),
+        ]
+
 
 
 
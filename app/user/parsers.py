@@ -0,0 +1,115 @@
+import hashlib
+import os
+import zipfile
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser, MultiPartParserError
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from app.global_constants import ErrorMessage
+
+RESUME_FIELD = "resume_file"
+
+# Leading bytes of each accepted resume format (DOCX is a zip container)
+RESUME_MAGIC_BYTES = {
+    "pdf": b"%PDF-",
+    "docx": b"PK\x03\x04",
+}
+
+
+class ResumeUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream the `resume_file` upload to a temporary file while hashing and checking it.
+
+    The type is sniffed from the first chunk's magic bytes, not the client content type,
+    and the upload stops as soon as it is of the wrong type or exceeds `max_size`.
+    The finished file carries `sha256` and `resume_type`; its extension matches the sniffed
+    type. On rejection `error` holds the reason. Other file fields are stored as usual.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or settings.RESUME_UPLOAD_MAX_SIZE
+        self.error = None
+        self._hasher = None
+        self._resume_type = None
+
+    def _reject(self, message):
+        self.error = message
+        # Drain the rest of the body without storing it so the client still gets the 400
+        raise StopUpload(connection_reset=False)
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, content_length, *args, **kwargs)
+        if field_name != RESUME_FIELD:
+            self._hasher = None
+            return
+        if content_length and content_length > self.max_size:
+            self._reject(ErrorMessage.RESUME_FILE_TOO_LARGE.value)
+        self._hasher = hashlib.sha256()
+        self._resume_type = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self._hasher is not None:
+            if start == 0:
+                self._resume_type = next(
+                    (file_type for file_type, magic in RESUME_MAGIC_BYTES.items() if raw_data.startswith(magic)), None
+                )
+                if self._resume_type is None:
+                    self._reject(ErrorMessage.UNSUPPORTED_FILE_TYPE.value)
+            if start + len(raw_data) > self.max_size:
+                self._reject(ErrorMessage.RESUME_FILE_TOO_LARGE.value)
+            self._hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if self._hasher is None:
+            return uploaded_file
+
+        if self._resume_type is None:
+            # Empty upload: no first chunk to sniff
+            self._reject(ErrorMessage.UNSUPPORTED_FILE_TYPE.value)
+
+        if self._resume_type == "docx":
+            # Any zip starts with PK; a Word document has its body in word/document.xml
+            try:
+                with zipfile.ZipFile(uploaded_file.temporary_file_path()) as archive:
+                    is_docx = "word/document.xml" in archive.namelist()
+            except zipfile.BadZipFile:
+                is_docx = False
+            if not is_docx:
+                self._reject(ErrorMessage.UNSUPPORTED_FILE_TYPE.value)
+
+        uploaded_file.sha256 = self._hasher.hexdigest()
+        uploaded_file.resume_type = self._resume_type
+        # Text extraction picks the parser from the extension
+        uploaded_file.name = f"{os.path.splitext(uploaded_file.name)[0]}.{self._resume_type}"
+        self._hasher = None
+        return uploaded_file
+
+
+class ResumeMultiPartParser(MultiPartParser):
+    """Multipart parser that receives `resume_file` through ResumeUploadHandler."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        upload_handler = ResumeUploadHandler(request._request)
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, [upload_handler], encoding)
+            data, files = parser.parse()
+        except MultiPartParserError as exc:
+            raise ParseError('Multipart form parse error - %s' % str(exc))
+
+        if upload_handler.error:
+            raise serializers.ValidationError({RESUME_FIELD: [upload_handler.error]})
+
+        return DataAndFiles(data, files)
@@ -1,8 +1,15 @@
+import logging
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 
+from app.analytics.analytics_utils import adjust_daily_user_registration
+from app.resume.resume_utils import queue_resume_processing
 from app.role.models import Role
 
+logger = logging.getLogger('django')
+
 
 class SuperAdminUserCreateSerializer(serializers.ModelSerializer):
     """ Serializer: Create a new user """
@@ -30,6 +37,7 @@ class SuperAdminUserCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         password = validated_data.pop('password')
         user = get_user_model().objects.create_user(password=password, **validated_data)
+        adjust_daily_user_registration(user, 1)
         return user
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -60,17 +68,23 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return email
 
     def validate_resume_file(self, value):
-        if value:
-            allowed_types = ['application/pdf',
-                             'application/msword',
-                             'application/vnd.openxmlformats-officedocument.wordprocessingml.document']
-            if value.content_type not in allowed_types:
-                raise serializers.ValidationError("Resume must be a PDF or Word document.")
+        # The type is sniffed from the file content by ResumeUploadHandler, not taken from the client
+        if value and getattr(value, 'resume_type', None) is None:
+            raise serializers.ValidationError("Resume must be a PDF or Word document.")
         return value
 
     def create(self, validated_data):
         password = validated_data.pop('password')
+        resume_file = validated_data.get('resume_file')
+        if resume_file:
+            # Hashed while streaming in; keys the extracted-text and profile stores
+            validated_data['resume_hash'] = resume_file.sha256
+        # The file storage moves the spooled upload into place before the row is inserted
         user = get_user_model().objects.create_user(password=password, **validated_data)
+        adjust_daily_user_registration(user, 1)
+        if resume_file:
+            # Text extraction and profiling run on the resume pool once the user row has committed
+            transaction.on_commit(lambda: queue_resume_processing(user.pk), robust=True)
         return user
 
 class RoleDisplaySerializer(serializers.ModelSerializer):
@@ -138,6 +152,18 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Email already in use")
         return email
 
+    def update(self, instance, validated_data):
+        role = validated_data.get('role')
+        if role is None or role.pk == instance.role_id or not instance.is_active:
+            return super().update(instance, validated_data)
+
+        # The registration rollup is keyed by role, so the user's count moves with them
+        with transaction.atomic():
+            adjust_daily_user_registration(instance, -1)
+            instance = super().update(instance, validated_data)
+            adjust_daily_user_registration(instance, 1)
+        return instance
+
 
 class RegularUserDisplaySerializer(serializers.ModelSerializer):
     """ Serializer: Display user details """
@@ -181,11 +207,17 @@ class RegularUserUpdateSerializer(serializers.ModelSerializer):
         return email
 
     def validate_resume_file(self, value):
-        if value:
-            allowed_types = ['application/pdf',
-                             'application/msword',
-                             'application/vnd.openxmlformats-officedocument.wordprocessingml.document']
-            if value.content_type not in allowed_types:
-                raise serializers.ValidationError("Resume must be a PDF or Word document.")
+        # The type is sniffed from the file content by ResumeUploadHandler, not taken from the client
+        if value and getattr(value, 'resume_type', None) is None:
+            raise serializers.ValidationError("Resume must be a PDF or Word document.")
         return value
 
+    def update(self, instance, validated_data):
+        resume_file = validated_data.get('resume_file')
+        if 'resume_file' in validated_data:
+            # Hashed while streaming in; keys the extracted-text and profile stores
+            validated_data['resume_hash'] = resume_file.sha256 if resume_file else None
+        instance = super().update(instance, validated_data)
+        if resume_file:
+            transaction.on_commit(lambda: queue_resume_processing(instance.pk), robust=True)
+        return instance
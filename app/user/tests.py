@@ -1,3 +1,289 @@
-from django.test import TestCase
+import copy
+import hashlib
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from app.analytics.analytics_utils import adjust_daily_user_registration, get_dashboard_counts
+from app.analytics.models import DailyUserRegistration
+from app.core.tests import IndexPlanTestCase
+from app.global_constants import ErrorMessage, RoleConstants
+from app.role.models import Role
+from app.user.authentication import ClaimsJWTAuthentication, ClaimsRefreshToken, ClaimsUser
+from app.user.user_utils import TokenBlacklistFilter, token_blacklist_filter
+from app.user.views import UserListFilterAPI
+
+
+class UserTestCase(TestCase):
+    password = "Password123!"
+
+    def setUp(self):
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", self.password, role=role, first_name="Jane", last_name="Doe"
+        )
+        self.client = APIClient()
+
+    def authenticate(self, user=None):
+        refresh = ClaimsRefreshToken.for_user(user or self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        return refresh
+
+
+class ClaimsAuthenticationTests(UserTestCase):
+    def test_claims_are_read_without_loading_the_user(self):
+        access_token = ClaimsRefreshToken.for_user(self.user).access_token
+        with CaptureQueriesContext(connection) as queries:
+            user = ClaimsUser(access_token)
+            self.assertTrue(user and user.is_authenticated)
+            self.assertEqual((user.pk, user.role_id, user.is_active), (self.user.pk, RoleConstants.USER.value, True))
+        self.assertEqual(len(queries), 0)
+
+    def test_copies_keep_the_token_claims(self):
+        user = ClaimsUser(ClaimsRefreshToken.for_user(self.user).access_token)
+        for user_copy in (copy.copy(user), copy.deepcopy(user)):
+            self.assertIsInstance(user_copy, ClaimsUser)
+            self.assertEqual((user_copy.id, user_copy.role_id), (self.user.pk, RoleConstants.USER.value))
+            self.assertEqual(user_copy.email, self.user.email)
+
+    def test_copy_of_loaded_user_is_the_user(self):
+        user = ClaimsUser(ClaimsRefreshToken.for_user(self.user).access_token)
+        self.assertEqual(user.email, self.user.email)
+        self.assertEqual(copy.copy(user), self.user)
+
+    def test_deactivated_user_cannot_write_with_an_unexpired_token(self):
+        self.authenticate()
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get("/api/user/me").status_code, 200)
+        self.assertEqual(self.client.patch("/api/user/me", {"first_name": "X"}).status_code, 401)
+
+    def test_writes_are_authenticated_without_loading_the_user(self):
+        access_token = ClaimsRefreshToken.for_user(self.user).access_token
+        request = Request(APIRequestFactory().post("/api/resume/score", HTTP_AUTHORIZATION=f"Bearer {access_token}"))
+
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+            self.assertEqual(user.role_id, RoleConstants.USER.value)
+        self.assertEqual(len(queries), 0)
+
+    def test_revoked_token_cannot_write(self):
+        self.authenticate()
+        get_user_model().objects.filter(pk=self.user.pk).update(token_version=1)
+
+        self.assertEqual(self.client.patch("/api/user/me", {"first_name": "X"}).status_code, 401)
+
+    def test_active_user_can_write(self):
+        self.authenticate()
+        response = self.client.patch("/api/user/me", {"first_name": "Janet"})
+        self.assertEqual(response.status_code, 201)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Janet")
+
+
+class TokenRefreshTests(UserTestCase):
+    def test_refresh_issues_access_token(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        response = self.client.post("/api/user/token/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json()["results"])
+
+    def test_logged_out_refresh_token_is_rejected(self):
+        refresh = self.authenticate()
+        response = self.client.post("/api/user/logout/", {"refresh_token": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, 204)
+
+        response = self.client.post("/api/user/token/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_token_blacklisted_by_another_process_is_rejected(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        # Written directly, as by another worker; picked up by this process's filter on its next poll
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh["jti"]))
+
+        with mock.patch.object(token_blacklist_filter, "_next_poll", 0.0):
+            response = self.client.post("/api/user/token/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_after_deactivation_is_rejected(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.client.post("/api/user/token/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+
+class UserRoleChangeTests(UserTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin_role = Role.objects.create(id=RoleConstants.SUPER_ADMIN.value, name="Super Admin")
+        admin = get_user_model().objects.create_user("admin@example.com", self.password, role=self.admin_role)
+        self.authenticate(admin)
+        adjust_daily_user_registration(self.user, 1)
+
+    def registrations(self):
+        return dict(DailyUserRegistration.objects.values_list("role_id", "count"))
+
+    def test_role_change_moves_the_registration(self):
+        response = self.client.patch(f"/api/user/{self.user.pk}", {"role": self.admin_role.pk}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.registrations(), {RoleConstants.USER.value: 0, RoleConstants.SUPER_ADMIN.value: 1})
+
+    def test_other_changes_keep_the_registration(self):
+        response = self.client.patch(f"/api/user/{self.user.pk}", {"first_name": "Janet"}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.registrations(), {RoleConstants.USER.value: 1})
+
+
+def _docx(with_body=True):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml" if with_body else "content.txt", "<w:document/>")
+    return buffer.getvalue()
+
+
+@mock.patch("app.user.serializers.queue_resume_processing")
+class ResumeUploadTests(UserTestCase):
+    pdf = b"%PDF-1.4\n" + b"0" * 2048
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _sign_up(self, content, name="resume.pdf"):
+        data = {
+            "email": "new@example.com",
+            "password": self.password,
+            "first_name": "New",
+            "last_name": "User",
+            "resume_file": SimpleUploadedFile(name, content, content_type="application/octet-stream"),
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/user/user-sign-up/", data, format="multipart")
+
+    def test_pdf_is_stored_with_its_hash_before_the_response(self, queue_resume_processing):
+        response = self._sign_up(self.pdf, name="resume.bin")
+
+        self.assertEqual(response.status_code, 201)
+        user = get_user_model().objects.get(email="new@example.com")
+        self.assertEqual(user.resume_hash, hashlib.sha256(self.pdf).hexdigest())
+        self.assertTrue(user.resume_file.name.endswith(".pdf"))
+        with user.resume_file.open("rb") as file_handle:
+            self.assertEqual(file_handle.read(), self.pdf)
+        # Only the text extraction and profiling are deferred
+        queue_resume_processing.assert_called_once_with(user.pk)
+
+    def test_docx_is_accepted(self, queue_resume_processing):
+        response = self._sign_up(_docx(), name="resume.docx")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(get_user_model().objects.get(email="new@example.com").resume_file.name.endswith(".docx"))
+
+    def test_type_is_sniffed_not_taken_from_the_name(self, queue_resume_processing):
+        response = self._sign_up(b"just some text", name="resume.pdf")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["results"]["resume_file"], [ErrorMessage.UNSUPPORTED_FILE_TYPE.value])
+        self.assertFalse(get_user_model().objects.filter(email="new@example.com").exists())
+        queue_resume_processing.assert_not_called()
+
+    def test_zip_without_word_document_is_rejected(self, queue_resume_processing):
+        response = self._sign_up(_docx(with_body=False), name="resume.docx")
+        self.assertEqual(response.status_code, 400)
+        queue_resume_processing.assert_not_called()
+
+    @override_settings(RESUME_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_upload_is_rejected(self, queue_resume_processing):
+        response = self._sign_up(self.pdf)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["results"]["resume_file"], [ErrorMessage.RESUME_FILE_TOO_LARGE.value])
+        queue_resume_processing.assert_not_called()
+
+
+class TokenBlacklistFilterTests(TestCase):
+    def setUp(self):
+        self.blacklist_filter = TokenBlacklistFilter(capacity=100, error_rate=0.01, poll_interval=0, poll_overlap=10,
+                                                     rebuild_interval=3600)
+
+    def _blacklist(self, jti, blacklisted_id=None):
+        token = OutstandingToken.objects.create(jti=jti, token=jti, expires_at=timezone.now() + timedelta(days=1))
+        return BlacklistedToken.objects.create(id=blacklisted_id, token=token)
+
+    def test_poll_picks_up_new_rows(self):
+        self.assertNotIn("first", self.blacklist_filter)
+        self._blacklist("first")
+        self.assertIn("first", self.blacklist_filter)
+
+    def test_out_of_order_commit_is_still_rejected(self):
+        self._blacklist("late-id", blacklisted_id=50)
+        self.assertIn("late-id", self.blacklist_filter)
+
+        # A row whose id was allocated earlier but which committed after the last poll
+        self._blacklist("early-id", blacklisted_id=45)
+        self.assertIn("early-id", self.blacklist_filter)
+
+    def test_rebuild_catches_rows_outside_the_overlap(self):
+        self._blacklist("late-id", blacklisted_id=500)
+        self.assertIn("late-id", self.blacklist_filter)
+
+        self._blacklist("early-id", blacklisted_id=5)
+        self.blacklist_filter._next_rebuild = 0
+        self.assertIn("early-id", self.blacklist_filter)
+
+    def test_repolled_rows_are_counted_once(self):
+        self._blacklist("first")
+        for _ in range(3):
+            self.assertIn("first", self.blacklist_filter)
+        self.assertEqual(self.blacklist_filter._bloom.count, 1)
+
+
+class UserIndexPlanTests(IndexPlanTestCase):
+    """The admin user list and the dashboard user count are answered from the User indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Role.objects.create(id=RoleConstants.SUPER_ADMIN.value, name="Super Admin")
+        role = Role.objects.create(id=RoleConstants.USER.value, name="Regular User")
+        get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{index}@example.com", first_name=f"First{index}", last_name=f"Last{index}",
+                             password="!", role=role, is_active=index % 10 != 0)
+            for index in range(5000)
+        )
+        cls.analyze(get_user_model())
+
+    def test_user_list_uses_role_index(self):
+        self.assertUsesIndex(self.explain_page(UserListFilterAPI), "user_role_updated")
+
+    def test_user_list_prefix_filters_use_pattern_indexes(self):
+        for param, value, index_name in (
+            ("email", "user4999@", "user_email_upper_prefix"),
+            ("first_name", "first4999", "user_first_name_upper_prefix"),
+            ("last_name", "last4999", "user_last_name_upper_prefix"),
+        ):
+            with self.subTest(param=param):
+                self.assertUsesIndex(self.explain_page(UserListFilterAPI, **{param: value}), index_name)
+
+    def test_dashboard_user_count_uses_partial_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            get_dashboard_counts()
+        # The first query counts the active users and finds the latest registration
+        self.assertUsesIndex(self.explain(queries[0]["sql"]), "user_role_active_created")
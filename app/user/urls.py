@@ -1,11 +1,12 @@
 from django.urls import path
 
-from app.user.views import SuperAdminSetupView, UserLogin, UserLogout, UserDetailAPI, \
+from app.user.views import SuperAdminSetupView, UserLogin, UserLogout, UserTokenRefresh, UserDetailAPI, \
     UserSetupView, UserListFilterAPI, ActivateUserAPI, RegularUserDetailAPI
 
 urlpatterns = [
     # Authentication
     path('login/', UserLogin.as_view(), name='user-login'),
+    path('token/refresh/', UserTokenRefresh.as_view(), name='user-token-refresh'),
     path('logout/', UserLogout.as_view(), name='user-logout'),
 
     # Setup
@@ -0,0 +1,152 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+logger = logging.getLogger('django')
+
+# Outdated password hashes are upgraded off the login request
+_hash_upgrade_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-hash-upgrade")
+
+
+def _upgrade_password_hash(user_id: int, encoded: str, password: str):
+    """Executor task: re-hash a password with the configured hasher / iteration count."""
+    try:
+        # Only replace the hash that was verified, in case the password changed meanwhile
+        get_user_model().objects.filter(pk=user_id, password=encoded).update(password=make_password(password))
+    except Exception as e:
+        logger.error(f"Password hash upgrade failed for user {user_id}: {str(e)}", exc_info=True)
+    finally:
+        connection.close()
+
+
+def verify_password(user, password: str) -> bool:
+    """
+    Check `password` against the user's stored hash.
+
+    An outdated hash (older hasher or fewer iterations than configured) is upgraded in the
+    background instead of on the request thread.
+    """
+    user_id, encoded = user.pk, user.password
+
+    def setter(raw_password):
+        _hash_upgrade_executor.submit(_upgrade_password_hash, user_id, encoded, raw_password)
+
+    return check_password(password, encoded, setter)
+
+
+def update_last_login(user):
+    """Set last_login with a single UPDATE of that column."""
+    user.last_login = timezone.now()
+    get_user_model().objects.filter(pk=user.pk).update(last_login=user.last_login)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings; no false negatives, `error_rate` false positives at capacity."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        if key in self:
+            # Already present (or a false positive): re-polled keys must not count twice
+            return
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TokenBlacklistFilter:
+    """
+    Per-process Bloom filter of blacklisted refresh token JTIs.
+
+    The filter is built from the unexpired blacklist on first use, then picks up rows
+    blacklisted by other processes by polling, at most every `poll_interval` seconds.
+    Ids are allocated before commit, so a row can become visible after rows with higher
+    ids: each poll re-reads the last `poll_overlap` ids below the highest one seen, and
+    the filter is rebuilt every `rebuild_interval` seconds as a backstop. It is also
+    rebuilt (dropping expired tokens) once it holds more than its capacity.
+    Tokens blacklisted in this process are added at once.
+    A miss means the token is not blacklisted; only hits need the database check.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, poll_interval: float, poll_overlap: int,
+                 rebuild_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.poll_interval = poll_interval
+        self.poll_overlap = poll_overlap
+        self.rebuild_interval = rebuild_interval
+        self._bloom = None
+        self._last_id = 0
+        self._next_poll = 0.0
+        self._next_rebuild = 0.0
+        self._lock = threading.Lock()
+
+    def _rebuild(self):
+        blacklisted = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        last_id = BlacklistedToken.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        bloom = BloomFilter(max(self.capacity, 2 * blacklisted.count()), self.error_rate)
+        for jti in blacklisted.values_list("token__jti", flat=True).iterator(chunk_size=5000):
+            bloom.add(jti)
+        self._bloom, self._last_id = bloom, last_id
+        self._next_rebuild = time.monotonic() + self.rebuild_interval
+
+    def _poll(self):
+        rows = BlacklistedToken.objects.filter(id__gt=self._last_id - self.poll_overlap).values_list("id", "token__jti")
+        for blacklisted_id, jti in rows:
+            self._bloom.add(jti)
+            self._last_id = max(self._last_id, blacklisted_id)
+        if self._bloom.count > self._bloom.capacity:
+            self._rebuild()
+
+    def _sync(self):
+        if self._bloom is not None and time.monotonic() < self._next_poll:
+            return
+        with self._lock:
+            if self._bloom is None or time.monotonic() >= self._next_rebuild:
+                self._rebuild()
+            elif time.monotonic() >= self._next_poll:
+                self._poll()
+            self._next_poll = time.monotonic() + self.poll_interval
+
+    def add(self, jti: str):
+        self._sync()
+        with self._lock:
+            self._bloom.add(jti)
+
+    def __contains__(self, jti: str) -> bool:
+        self._sync()
+        return jti in self._bloom
+
+
+token_blacklist_filter = TokenBlacklistFilter(
+    capacity=settings.TOKEN_BLACKLIST_FILTER_CAPACITY,
+    error_rate=settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE,
+    poll_interval=settings.TOKEN_BLACKLIST_FILTER_POLL_INTERVAL,
+    poll_overlap=settings.TOKEN_BLACKLIST_FILTER_POLL_OVERLAP,
+    rebuild_interval=settings.TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL,
+)
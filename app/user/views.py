@@ -1,25 +1,28 @@
 import logging
 
 from django.conf import settings
-from django.contrib.auth import get_user_model, login
+from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView, ListAPIView
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import FormParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.throttling import AnonRateThrottle
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 
-from app.core.views import CustomPageNumberPagination
+from app.analytics.analytics_utils import adjust_daily_user_registration
+from app.core.views import KeysetPagination
 from app.global_constants import SuccessMessage, ErrorMessage, GlobalValues
+from app.user.authentication import ClaimsRefreshToken, TOKEN_VERSION_CLAIM, set_user_claims
+from app.user.parsers import ResumeMultiPartParser
 from app.user.serializers import UserDisplaySerializer, UserCreateSerializer, UserListFilterDisplaySerializer, \
     UserUpdateSerializer, SuperAdminUserCreateSerializer, RegularUserDisplaySerializer, RegularUserUpdateSerializer
+from app.user.user_utils import update_last_login, verify_password
 from app.utils import get_response_schema
-from permissions import IsSuperAdmin, IsUser
+from permissions import IsCurrentAccount, IsSuperAdmin, IsUser
 
 logger = logging.getLogger('django')
 
@@ -63,7 +66,7 @@ class SuperAdminSetupView(GenericAPIView):
 class UserSetupView(GenericAPIView):
     """ View: Admin setup """
     throttle_classes = [UserCreateThrottle]
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [ResumeMultiPartParser, FormParser]
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -83,26 +86,25 @@ class UserSetupView(GenericAPIView):
         ]
     )
     def post(self, request):
-        with transaction.atomic():
-
-            data = request.data.copy()  # make mutable copy
-            data['role'] = GlobalValues.USER.value
+        # Mutable copy of the form fields only; uploaded files cannot be deep-copied
+        data = request.POST.copy()
+        data['role'] = GlobalValues.USER.value
 
+        if 'resume_file' in request.FILES:
+            data['resume_file'] = request.FILES['resume_file']
 
-            if 'resume_file' in request.FILES:
-                data['resume_file'] = request.FILES['resume_file']
-
-            serializer = UserCreateSerializer(data=data)
-            if serializer.is_valid():
-                serializer.save()
-
-                user = get_user_model().objects.get(pk=serializer.data['pk'])
-                response_serializer = UserDisplaySerializer(user)
+        serializer = UserCreateSerializer(data=data)
+        if serializer.is_valid():
+            # Only the user row and the resume file are written in the transaction; the resume
+            # is processed once it commits
+            with transaction.atomic():
+                user = serializer.save()
+            response_serializer = UserDisplaySerializer(user)
 
-                return get_response_schema(response_serializer.data, SuccessMessage.RECORD_CREATED.value,
-                                           status.HTTP_201_CREATED, )
+            return get_response_schema(response_serializer.data, SuccessMessage.RECORD_CREATED.value,
+                                       status.HTTP_201_CREATED, )
 
-            return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
+        return get_response_schema(serializer.errors, ErrorMessage.BAD_REQUEST.value, status.HTTP_400_BAD_REQUEST)
 
 
 class UserLoginThrottle(AnonRateThrottle):
@@ -138,7 +140,7 @@ class UserLogin(GenericAPIView):
                     status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_user_model().objects.filter(email=email, is_active=True).first()
+            user = get_user_model().objects.select_related('role').filter(email=email, is_active=True).first()
 
             if user is None:
                 logger.warning(f"Login attempt for non-existent email: {email}")
@@ -148,7 +150,7 @@ class UserLogin(GenericAPIView):
                     status.HTTP_404_NOT_FOUND
                 )
 
-            if not user.check_password(password):
+            if not verify_password(user, password):
                 logger.warning(f"Failed login attempt for user: {email}")
                 return get_response_schema(
                     {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.PASSWORD_MISMATCH.value]},
@@ -156,14 +158,10 @@ class UserLogin(GenericAPIView):
                     status.HTTP_400_BAD_REQUEST
                 )
 
-            # Successful authentication
-            login(request, user)
-
-            # upadte last login
-            user.last_login = timezone.now()
-            user.save()
+            # Successful authentication: JWT only, no session row
+            update_last_login(user)
 
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             user_data = self.get_serializer(user).data
 
             # Log successful login (without sensitive data)
@@ -190,10 +188,52 @@ class UserLogin(GenericAPIView):
             )
 
 
+class UserTokenRefresh(GenericAPIView):
+    """ View: Issue a new access token from a refresh token """
+
+    # An expired access token in the header must not block the refresh
+    authentication_classes = []
+    throttle_classes = [UserLoginThrottle]
+
+    @swagger_auto_schema(
+        request_body=
+        openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'refresh': openapi.Schema(type=openapi.TYPE_STRING, description='refresh token'),
+            },
+        )
+    )
+    def post(self, request):
+        try:
+            refresh = ClaimsRefreshToken(request.data.get('refresh'))
+        except TokenError:
+            return get_response_schema(
+                {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.TOKEN_INVALID.value]},
+                ErrorMessage.UNAUTHORIZED.value,
+                status.HTTP_401_UNAUTHORIZED
+            )
+
+        # The one user lookup per access token lifetime: picks up role / activation changes and revocations
+        user = get_user_model().objects.filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True
+        ).only('pk', 'role_id', 'is_active', 'token_version').first()
+
+        if user is None or refresh.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            return get_response_schema(
+                {settings.REST_FRAMEWORK['NON_FIELD_ERRORS_KEY']: [ErrorMessage.TOKEN_INVALID.value]},
+                ErrorMessage.UNAUTHORIZED.value,
+                status.HTTP_401_UNAUTHORIZED
+            )
+
+        access = set_user_claims(refresh.access_token, user)
+
+        return get_response_schema({'access': str(access)}, SuccessMessage.TOKEN_REFRESHED.value, status.HTTP_200_OK)
+
+
 class UserLogout(GenericAPIView):
     """ View: User logout """
 
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -208,7 +248,7 @@ class UserLogout(GenericAPIView):
     def post(self, request):
         try:
             refresh_token = request.data.get('refresh_token')
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
 
             return get_response_schema({}, SuccessMessage.CREDENTIALS_REMOVED.value, status.HTTP_204_NO_CONTENT)
@@ -217,7 +257,7 @@ class UserLogout(GenericAPIView):
 
 
 class UserDetailAPI(GenericAPIView):
-    permission_classes = [IsSuperAdmin]
+    permission_classes = [IsSuperAdmin, IsCurrentAccount]
 
     def get_object(self, pk):
 
@@ -269,7 +309,10 @@ class UserDetailAPI(GenericAPIView):
             )
 
         user.is_active = False
+        # Revoke the user's refresh tokens; outstanding access tokens expire within ACCESS_TOKEN_LIFETIME
+        user.token_version += 1
         user.save()
+        adjust_daily_user_registration(user, -1)
 
         logger.info(f"Successfully deleted user with ID {pk}")
 
@@ -335,9 +378,9 @@ class UserListFilterAPI(ListAPIView):
     """User List filter for Superadmin"""
 
     serializer_class = UserListFilterDisplaySerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-updated", "-pk")
 
-    authentication_classes = [JWTAuthentication]
     permission_classes = [IsSuperAdmin]
 
     def get_queryset(self):
@@ -424,8 +467,7 @@ class UserListFilterAPI(ListAPIView):
 class ActivateUserAPI(GenericAPIView):
     """Activate user for Superadmin"""
 
-    authentication_classes = [JWTAuthentication]
-    permission_classes = [IsSuperAdmin]
+    permission_classes = [IsSuperAdmin, IsCurrentAccount]
 
     def get_object(self, pk):
 
@@ -453,6 +495,7 @@ class ActivateUserAPI(GenericAPIView):
 
         user.is_active = True
         user.save()
+        adjust_daily_user_registration(user, 1)
 
         logger.info(f"Successfully activated user with ID {pk}")
 
@@ -461,23 +504,14 @@ class ActivateUserAPI(GenericAPIView):
 
 # User views
 class RegularUserDetailAPI(GenericAPIView):
-    parser_classes = [MultiPartParser, FormParser]
+    parser_classes = [ResumeMultiPartParser, FormParser]
 
-    permission_classes = [IsUser]
+    permission_classes = [IsUser, IsCurrentAccount]
 
     def get(self, request):
 
-        user_queryset = get_user_model().objects.filter(pk=request.user.id, role_id=GlobalValues.USER.value,
-                                                        is_active=True).first()
-        if not user_queryset:
-            logger.error(f"Error retrieving user with ID {request.user.id}", exc_info=True)
-            return get_response_schema(
-                {},
-                ErrorMessage.NOT_FOUND.value,
-                status.HTTP_404_NOT_FOUND
-            )
-
-        serializer = RegularUserDisplaySerializer(user_queryset)
+        # IsUser already checked the role and active claims; request.user loads the row once here
+        serializer = RegularUserDisplaySerializer(request.user)
         return get_response_schema(
             serializer.data,
             SuccessMessage.RECORD_RETRIEVED.value,
@@ -498,17 +532,7 @@ class RegularUserDetailAPI(GenericAPIView):
     )
     def patch(self, request):
 
-        user_queryset = get_user_model().objects.filter(pk=request.user.id, role_id=GlobalValues.USER.value,
-                                                        is_active=True).first()
-        if not user_queryset:
-            logger.error(f"Error retrieving user with ID {request.user.id}", exc_info=True)
-            return get_response_schema(
-                {},
-                ErrorMessage.NOT_FOUND.value,
-                status.HTTP_404_NOT_FOUND
-            )
-
-        serializer = RegularUserUpdateSerializer(user_queryset, data=request.data, partial=True)
+        serializer = RegularUserUpdateSerializer(request.user, data=request.data, partial=True)
 
         if serializer.is_valid():
             serializer.save()
@@ -0,0 +1,14 @@
+import os
+
+# Read by `gunicorn app.wsgi:application` (see Procfile) from the working directory
+
+# Give in-flight AI requests (LLM_TIMEOUT plus retries) time to finish on shutdown or
+# max_requests recycling before the arbiter kills the worker
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 90))
+
+
+def worker_exit(server, worker):
+    """Write the AI analytics rows still buffered in this worker before it exits."""
+    from app.analytics.analytics_utils import analytics_writer
+
+    analytics_writer.flush()
@@ -1,6 +1,7 @@
-from rest_framework.permissions import BasePermission
+from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 from app.global_constants import GlobalValues
+from app.user.authentication import verify_current_account
 
 
 class IsSuperAdmin(BasePermission):
@@ -24,4 +25,18 @@ class IsSuperAdminOrUser(BasePermission):
     Allows access only to users with the SuperAdmin or User role.
     """
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and (request.user.role_id == GlobalValues.SUPER_ADMIN.value or request.user.role_id == GlobalValues.USER.value)
\ No newline at end of file
+        return request.user and request.user.is_authenticated and (request.user.role_id == GlobalValues.SUPER_ADMIN.value or request.user.role_id == GlobalValues.USER.value)
+
+
+class IsCurrentAccount(BasePermission):
+    """
+    Allows writes only while the token's account is active and the token is not revoked.
+
+    The role permissions trust the access token claims; this one loads the user, so use it
+    only on endpoints that change credentials or accounts.
+    """
+    def has_permission(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        verify_current_account(request)
+        return True